@@ -286,6 +286,7 @@ CREATE TABLE `grade` (
   `approved_by` int DEFAULT NULL COMMENT 'Staff user who approved the grade',
   
   PRIMARY KEY (`id`),
+  UNIQUE KEY `unique_grade_student_subject_term` (`student_id`, `subject_id`, `semester`, `academic_year`),
   KEY `student_id` (`student_id`),
   KEY `subject_id` (`subject_id`),
   KEY `approved_by` (`approved_by`),
@@ -293,6 +294,7 @@ CREATE TABLE `grade` (
   KEY `idx_grade_approved` (`approved_at`),
   KEY `idx_grade_is_complete` (`is_complete`),
   KEY `idx_grade_is_historical` (`is_historical`),
+  KEY `idx_grade_term` (`academic_year`, `semester`, `subject_id`),
   CONSTRAINT `grade_ibfk_1` FOREIGN KEY (`student_id`) REFERENCES `students` (`id`) ON DELETE CASCADE,
   CONSTRAINT `grade_ibfk_2` FOREIGN KEY (`subject_id`) REFERENCES `subject` (`id`) ON DELETE CASCADE,
   CONSTRAINT `grade_ibfk_3` FOREIGN KEY (`approved_by`) REFERENCES `user` (`id`) ON DELETE SET NULL
@@ -430,11 +432,12 @@ CREATE TABLE `audit_log` (
   `created_at` datetime DEFAULT CURRENT_TIMESTAMP,
   
   PRIMARY KEY (`id`),
-  KEY `user_id` (`user_id`),
-  KEY `idx_audit_log_action` (`action`),
-  KEY `idx_audit_log_status` (`status`),
-  KEY `idx_audit_log_created_at` (`created_at`),
+  KEY `idx_audit_log_created` (`created_at`, `id`),
+  KEY `idx_audit_log_action_created` (`action`, `created_at`, `id`),
+  KEY `idx_audit_log_status_created` (`status`, `created_at`, `id`),
+  KEY `idx_audit_log_user_created` (`user_id`, `created_at`, `id`),
   KEY `idx_audit_log_resource` (`resource_type`, `resource_id`),
+  FULLTEXT KEY `ft_audit_log_description` (`description`),
   CONSTRAINT `audit_log_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `user` (`id`) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
 COMMENT='System audit trail for all user actions';
@@ -456,12 +459,41 @@ CREATE TABLE `deans_list_record` (
   
   PRIMARY KEY (`id`),
   KEY `student_id` (`student_id`),
+  UNIQUE KEY `unique_deans_list_student_term` (`student_id`,`semester`,`academic_year`),
   KEY `idx_deans_list_qualified` (`qualified`),
   KEY `idx_deans_list_rank` (`rank`),
+  KEY `idx_deans_list_term` (`academic_year`,`semester`,`qualified`,`rank`),
   CONSTRAINT `deans_list_record_ibfk_1` FOREIGN KEY (`student_id`) REFERENCES `students` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
 COMMENT='Dean\'s List academic achievers tracking';
 
+-- -----------------------------------------------------
+-- Table: student_term_summary (Per-Term Grade Totals)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `student_term_summary`;
+CREATE TABLE `student_term_summary` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `student_id` int NOT NULL COMMENT 'References students.id (independent table)',
+  `academic_year` varchar(10) NOT NULL,
+  `semester` int NOT NULL,
+  `enrolled_count` int NOT NULL DEFAULT '0' COMMENT 'Grades in the term, complete or not',
+  `subject_count` int NOT NULL DEFAULT '0' COMMENT 'Complete grades',
+  `units` int NOT NULL DEFAULT '0' COMMENT 'Units of the complete grades',
+  `graded_units` int NOT NULL DEFAULT '0' COMMENT 'Units of complete grades with an equivalent grade',
+  `weighted_points` float NOT NULL DEFAULT '0' COMMENT 'Graded units x equivalent grade',
+  `academic_units` int NOT NULL DEFAULT '0' COMMENT 'Graded units of Academic subjects',
+  `academic_points` float NOT NULL DEFAULT '0',
+  `gwa` float DEFAULT NULL COMMENT 'Academic subjects only',
+  `average_percentage` float NOT NULL DEFAULT '0',
+  `is_complete` tinyint(1) NOT NULL DEFAULT 0 COMMENT 'Every grade of the term is complete',
+  `updated_at` datetime DEFAULT NULL,
+  
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `unique_student_term_summary` (`student_id`,`academic_year`,`semester`),
+  CONSTRAINT `student_term_summary_ibfk_1` FOREIGN KEY (`student_id`) REFERENCES `students` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+COMMENT='Per-student per-term grade totals, updated with every grade write';
+
 -- -----------------------------------------------------
 -- Table: notification (User Notifications)
 -- -----------------------------------------------------
@@ -483,6 +515,152 @@ CREATE TABLE `notification` (
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
 COMMENT='User notification system';
 
+-- -----------------------------------------------------
+-- Table: change_feed_events (Polling Cursors for Live Pages)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `change_feed_events`;
+CREATE TABLE `change_feed_events` (
+  `id` int NOT NULL AUTO_INCREMENT COMMENT 'Also the cursor clients poll with',
+  `resource` varchar(64) NOT NULL COMMENT 'enrollments, grades:<subject_id>, assignments:<subject_id>, schedules, exceptions',
+  `entity_id` int DEFAULT NULL,
+  `action` varchar(20) NOT NULL DEFAULT 'updated',
+  `created_at` datetime DEFAULT CURRENT_TIMESTAMP,
+  
+  PRIMARY KEY (`id`),
+  KEY `idx_change_feed_resource` (`resource`,`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+COMMENT='Change feed for cursor-based polling';
+
+-- -----------------------------------------------------
+-- Table: import_jobs (Background Bulk Imports)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `import_jobs`;
+CREATE TABLE `import_jobs` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `kind` varchar(30) NOT NULL COMMENT 'students, historical_grades',
+  `status` varchar(20) NOT NULL DEFAULT 'queued' COMMENT 'queued, running, completed, failed',
+  `file_name` varchar(255) NOT NULL,
+  `file_path` varchar(500) NOT NULL,
+  `created_by` int DEFAULT NULL,
+  `rows_processed` int NOT NULL DEFAULT 0,
+  `created_count` int NOT NULL DEFAULT 0,
+  `updated_count` int NOT NULL DEFAULT 0,
+  `error_count` int NOT NULL DEFAULT 0,
+  `error_details` text COMMENT 'JSON list of messages',
+  `checkpoint_row` int NOT NULL DEFAULT 0 COMMENT 'Last file row committed; a resumed job continues after it',
+  `run_start_rows` int NOT NULL DEFAULT 0,
+  `message` text,
+  `worker` varchar(100) DEFAULT NULL,
+  `created_at` datetime DEFAULT CURRENT_TIMESTAMP,
+  `started_at` datetime DEFAULT NULL,
+  `heartbeat_at` datetime DEFAULT NULL,
+  `finished_at` datetime DEFAULT NULL,
+  
+  PRIMARY KEY (`id`),
+  KEY `idx_import_jobs_status` (`status`,`id`),
+  KEY `created_by` (`created_by`),
+  CONSTRAINT `import_jobs_ibfk_1` FOREIGN KEY (`created_by`) REFERENCES `user` (`id`) ON DELETE SET NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+COMMENT='Queued and running bulk imports with resume checkpoints';
+
+-- -----------------------------------------------------
+-- Table: import_job_rows (Student Import Reports)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `import_job_rows`;
+CREATE TABLE `import_job_rows` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `job_id` int NOT NULL,
+  `file_row` int NOT NULL COMMENT 'Line in the uploaded file',
+  `student_id` varchar(255) DEFAULT NULL,
+  `username` varchar(255) DEFAULT NULL,
+  `status` varchar(20) NOT NULL COMMENT 'created, error',
+  `message` text,
+  
+  PRIMARY KEY (`id`),
+  KEY `idx_import_job_rows_job` (`job_id`,`file_row`),
+  CONSTRAINT `import_job_rows_ibfk_1` FOREIGN KEY (`job_id`) REFERENCES `import_jobs` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+COMMENT='Per-row outcomes of student imports, written with each committed chunk';
+
+-- -----------------------------------------------------
+-- Table: backup_change_log (Incremental Backup Tracking)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `backup_change_log`;
+CREATE TABLE `backup_change_log` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `table_name` varchar(64) NOT NULL,
+  `row_id` int NOT NULL,
+  `operation` varchar(10) NOT NULL COMMENT 'insert, update, delete',
+  `changed_at` datetime NOT NULL,
+  
+  PRIMARY KEY (`id`),
+  KEY `idx_backup_change_log_table` (`table_name`,`changed_at`),
+  KEY `idx_backup_change_log_changed` (`changed_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+COMMENT='Deletes, and changes to tables without updated_at, for delta backups';
+
+-- -----------------------------------------------------
+-- Table: daily_rollups (System Report Activity Counts)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `daily_rollups`;
+CREATE TABLE `daily_rollups` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `day` date NOT NULL,
+  `metric` varchar(30) NOT NULL COMMENT 'audit, staff_accounts, student_accounts, enrollments, grade_saves',
+  `dimension` varchar(64) NOT NULL DEFAULT '' COMMENT 'action, role or year level',
+  `status` varchar(20) NOT NULL DEFAULT '',
+  `count` int NOT NULL DEFAULT '0',
+  `updated_at` datetime DEFAULT NULL,
+  
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `unique_daily_rollup` (`metric`,`day`,`dimension`,`status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+COMMENT='Per-day activity counts behind the system report';
+
+-- -----------------------------------------------------
+-- Table: rollup_watermarks (Last Row Folded Into daily_rollups)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `rollup_watermarks`;
+CREATE TABLE `rollup_watermarks` (
+  `source` varchar(30) NOT NULL,
+  `last_id` int NOT NULL DEFAULT '0',
+  `updated_at` datetime DEFAULT NULL,
+  
+  PRIMARY KEY (`source`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+COMMENT='Last source row id folded into daily_rollups, per metric';
+
+-- -----------------------------------------------------
+-- Table: rollup_gaps (Ids Skipped By A Rollup Watermark)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `rollup_gaps`;
+CREATE TABLE `rollup_gaps` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `source` varchar(30) NOT NULL,
+  `row_id` int NOT NULL,
+  `created_at` datetime NOT NULL,
+  
+  PRIMARY KEY (`id`),
+  KEY `idx_rollup_gaps_source` (`source`,`row_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+COMMENT='Ids a rollup watermark moved past with no row yet, re-checked for late commits';
+
+-- -----------------------------------------------------
+-- Table: report_counters (System Report Totals)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS `report_counters`;
+CREATE TABLE `report_counters` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `name` varchar(30) NOT NULL COMMENT 'users, roles, departments, year_levels, grades, subjects, classes',
+  `dimension` varchar(64) NOT NULL DEFAULT '',
+  `value` double NOT NULL DEFAULT '0',
+  `updated_at` datetime DEFAULT NULL,
+  
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `unique_report_counter` (`name`,`dimension`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+COMMENT='Current user, grade, subject and class totals behind the system report';
+
 -- =====================================================
 -- DEMO DATA (Optional - for testing)
 -- =====================================================
@@ -558,8 +736,17 @@ TRACKING TABLES:
 14. audit_log - System activity logging
 15. deans_list_record - Dean's List tracking
 16. notification - User notifications
-
-TOTAL: 16 tables
+17. change_feed_events - Change feed for live page polling
+18. import_jobs - Background bulk imports
+19. backup_change_log - Rows changed since the last backup (delta backups)
+20. daily_rollups - Per-day activity counts for the system report
+21. rollup_watermarks - Last row folded into daily_rollups per source
+22. report_counters - Current totals for the system report
+23. student_term_summary - Per-student per-term grade totals
+24. import_job_rows - Per-row outcomes of student imports
+25. rollup_gaps - Ids skipped by a rollup watermark, re-checked for late commits
+
+TOTAL: 25 tables
 
 FOREIGN KEY RELATIONSHIPS:
 ✅ enrollment.student_id → students.id
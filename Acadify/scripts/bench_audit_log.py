@@ -0,0 +1,132 @@
+"""Audit log: system report and audit log page response times on a large audit_log table.
+
+Seeds --rows synthetic audit entries spread evenly over the last --days days (200
+staff users, a mix of actions, about 3% failed and 1% error), then times
+/api/system-report and the audit log page as an MIS/IT user: the first page, the
+page 400 pages in, and the failed-logins filter. With --archive, `flask
+archive-audit-log` runs first and the archive search is timed too.
+
+    python scripts/bench_audit_log.py --baseline 6a76022^      # before
+    python scripts/bench_audit_log.py --baseline 1f55c3a^      # with the search indexes
+    python scripts/bench_audit_log.py --archive                # after
+"""
+import io
+import random
+import statistics
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+import benchlib
+
+ACTIONS = ['login', 'login', 'login', 'logout', 'logout', 'update_grade', 'update_grade', 'view_report',
+           'create_account', 'approve_grade', 'export_data', 'update_schedule']
+WORDS = ['midterm', 'final', 'prelim', 'grade', 'rejected', 'approved', 'submitted', 'section', 'report', 'schedule']
+PAGE_SIZE = 50
+
+
+def seed_audit_log(acadify, rows, days, batch_size=50000):
+    rnd = random.Random(rows)
+    db = acadify.db
+    with acadify.app.app_context():
+        mis = acadify.User(username='bench_mis_it', email='bench_mis_it@example.com', password_hash='x',
+                           role='mis_it', first_name='Mis', last_name='Bench')
+        db.session.add(mis)
+        db.session.execute(db.insert(acadify.User), [
+            dict(username=f'staff{n}', email=f'staff{n}@example.com', password_hash='x',
+                 role='instructor' if n % 10 else 'registrar', first_name=f'First{n}', last_name=f'Last{n}')
+            for n in range(200)
+        ])
+        db.session.commit()
+        user_ids = [row[0] for row in db.session.query(acadify.User.id).all()]
+
+        start = datetime.utcnow() - timedelta(days=days)
+        step = timedelta(days=days) / rows
+        for offset in range(0, rows, batch_size):
+            batch = []
+            for n in range(offset, min(offset + batch_size, rows)):
+                roll = rnd.random()
+                batch.append(dict(
+                    user_id=rnd.choice(user_ids) if roll > 0.02 else None, action=rnd.choice(ACTIONS),
+                    resource_type='grade', resource_id=rnd.randrange(100000),
+                    description=' '.join(rnd.sample(WORDS, 3)) + f' #{n}', ip_address=f'10.0.{n % 256}.{n % 250 + 1}',
+                    user_agent='Mozilla/5.0', status='failed' if roll < 0.03 else 'error' if roll < 0.04 else 'success',
+                    created_at=start + step * n
+                ))
+            db.session.execute(db.insert(acadify.AuditLog), batch)
+            db.session.commit()
+        return db.session.get(acadify.User, mis.id)
+
+
+def median_ms(client, url, repeat):
+    """Median response time of url in ms, after one warm-up request"""
+    times = []
+    for attempt in range(repeat + 1):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+        if attempt:
+            times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 1)
+
+
+def deep_page_url(acadify, page):
+    """The audit log page `page` pages in: ?page= on the old page, ?after= with a cursor since keyset paging"""
+    search = getattr(acadify, 'AuditLogSearch', None)
+    if search is None:
+        return f'/misit/audit-logs?page={page}'
+    AuditLog = acadify.AuditLog
+    with acadify.app.app_context():
+        edge = AuditLog.query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).offset((page - 1) * PAGE_SIZE - 1).first()
+        return f'/misit/audit-logs?after={search.encode_cursor(edge)}'
+
+
+def main():
+    parser = benchlib.argument_parser(__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000000)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--archive', action='store_true', help='run `flask archive-audit-log` before measuring')
+    args = parser.parse_args()
+
+    acadify = benchlib.load_main(args)
+    results = {}
+    with benchlib.timed(results, 'seed'):
+        mis = seed_audit_log(acadify, args.rows, args.days)
+    print(f"Seeded {args.rows} audit log rows over {args.days} days in {results['seed']:.0f}s")
+
+    if args.archive:
+        with acadify.app.app_context():
+            runner = acadify.app.test_cli_runner()
+            output = runner.invoke(args=['archive-audit-log'], catch_exceptions=False).output
+            print(output.strip().splitlines()[-1])
+            live = acadify.db.session.query(acadify.db.func.count(acadify.AuditLog.id)).scalar()
+        print(f"{live} rows left in the live table")
+
+    client = benchlib.client_as(acadify, mis)
+    urls = [
+        ('system report', '/api/system-report'),
+        ('audit page 1', '/misit/audit-logs'),
+        ('audit page 400', deep_page_url(acadify, 400)),
+        ('failed logins filter', '/misit/audit-logs?action=login&status=failed'),
+    ]
+    if args.archive:
+        # Each archive search decompresses the days its filters cannot rule out, so run them once
+        year_ago = datetime.utcnow() - timedelta(days=365)
+        month_start = year_ago.replace(day=1)
+        month_end = (month_start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+        urls += [
+            ('archive first page', '/misit/audit-logs?source=archive'),
+            ('archive one month', f'/misit/audit-logs?source=archive&date_from={month_start:%Y-%m-%d}&date_to={month_end:%Y-%m-%d}'),
+            ('archive two-word search', '/misit/audit-logs?source=archive&q=midterm+rejected'),
+        ]
+
+    print(f"{'':<24} {'median ms':>9}")
+    for label, url in urls:
+        repeat = 1 if 'source=archive' in url else args.repeat
+        print(f"{label:<24} {median_ms(client, url, repeat):>9}")
+
+
+if __name__ == '__main__':
+    main()
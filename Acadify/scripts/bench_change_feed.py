@@ -0,0 +1,70 @@
+"""Idle-client load test for the live-updating pages: database queries per client per minute.
+
+Replays one minute of the polling each page does while nothing changes, at the
+intervals its template uses, and counts the SQL statements it costs. Every poll finds
+the per-process head cache expired, as it does with several workers or polls further
+apart than CHANGE_FEED_HEAD_TTL.
+
+    python scripts/bench_change_feed.py                      # change feed (after)
+    python scripts/bench_change_feed.py --baseline 803fc90^  # per-page polling (before)
+"""
+from datetime import datetime, timedelta
+
+import benchlib
+
+
+def main():
+    parser = benchlib.argument_parser(__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=300)
+    args = parser.parse_args()
+
+    acadify = benchlib.load_main(args)
+    benchlib.stub_templates(acadify)
+    staff = benchlib.seed_term(acadify, args.students)
+    feed = hasattr(acadify, 'get_changes_since')
+
+    with acadify.app.app_context():
+        # Enrollments older than a day: the dashboard's 24-hour window is empty
+        acadify.StudentSubject.query.update({'enrollment_date': datetime.utcnow() - timedelta(days=3)})
+        if feed:
+            acadify.db.session.add(acadify.ChangeFeedEvent(resource='enrollments', created_at=datetime.utcnow() - timedelta(hours=1)))
+        acadify.db.session.commit()
+        subject_id = acadify.ClassAssignment.query.first().subject_id
+
+    # (page, account, [(url, polls per minute)]) as each template polls
+    if feed:
+        pages = [
+            ('instructor dashboard', staff['instructor'], [('/api/get-enrollment-updates', 6)]),
+            ('grade encoding page', staff['instructor'], [(f'/api/changes?resources=assignments:{subject_id}', 2)]),
+            ('MIS schedule page', staff['mis_it'], [('/api/grade-encoding-schedule/check-updates', 2)]),
+        ]
+    else:
+        pages = [
+            ('instructor dashboard', staff['instructor'], [('/api/get-enrollment-updates', 6), ('/api/instructor-subject-counts', 6)]),
+            # The route this page polled was missing (404), so it cost no queries
+            ('grade encoding page', staff['instructor'], [('/api/get-assignment-updates', 2)]),
+            ('MIS schedule page', staff['mis_it'], [('/api/grade-encoding-schedule/check-updates', 2)]),
+        ]
+
+    queries = benchlib.QueryCounter(acadify)
+    print(f"{'page':24s} queries/client/min")
+    for page, account, polls in pages:
+        client = benchlib.client_as(acadify, account)
+        total = 0
+        for url, per_minute in polls:
+            separator = '&' if '?' in url else '?'
+            cursor = client.get(url).json['cursor'] if feed else None
+            queries.reset()
+            for _ in range(per_minute):
+                if feed:
+                    acadify._change_feed_head['checked_at'] = 0.0
+                    response = client.get(f'{url}{separator}cursor={cursor}')
+                else:
+                    response = client.get(url)
+                assert response.status_code in (200, 304, 404), (url, response.status_code)
+            total += queries.count
+        print(f'{page:24s} {total}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Grade sheet export: time and peak memory of an in-memory workbook, the streaming export and a cached download.
+
+Seeds one term of --students students (8 subjects each, about 90% graded, so the
+default makes some 52,000 grade rows) and exports the whole term three ways, each
+in its own process so peak RSS is its own:
+
+- naive: .all() rows into an in-memory openpyxl Workbook with the same layout,
+  the way download_grade_template builds its file (what the export would cost
+  without write-only mode)
+- streaming: /registrar/grade-sheet/export with an empty export cache
+- cached: the same download again, sent from the file the streaming run left
+
+    python scripts/bench_export.py --students 7200
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import benchlib
+
+MODES = ['naive', 'streaming', 'cached']
+TERM = {'academic_year': '2024-2025', 'semester': 1}
+
+
+def naive_grade_sheet(acadify):
+    """The grade sheet workbook built in memory, cell by cell; returns (rows, bytes)"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    Grade, Student, Subject = acadify.Grade, acadify.Student, acadify.Subject
+    rows = acadify.db.session.query(
+        Student.student_id, Subject.subject_code, Grade.semester, Grade.academic_year,
+        Grade.prelim_grade, Grade.midterm_grade, Grade.final_grade
+    ).join(Student, Grade.student_id == Student.id).join(Subject, Grade.subject_id == Subject.id).filter(
+        Grade.academic_year == TERM['academic_year'], Grade.semester == TERM['semester']
+    ).order_by(Subject.subject_code, Student.student_id).all()
+
+    workbook = Workbook()
+    worksheet = workbook.active
+    thin = Side(style='thin')
+    box = Border(left=thin, right=thin, top=thin, bottom=thin)
+    center = Alignment(horizontal='center')
+    spread = Alignment(horizontal='centerContinuous')
+    worksheet['I7'] = acadify.COLLEGE_NAME
+    worksheet['I7'].font = Font(bold=True)
+    worksheet['I7'].alignment = center
+    worksheet.merge_cells('I7:L7')
+    worksheet['H8'] = acadify.COLLEGE_ADDRESS
+    worksheet['H8'].alignment = center
+    worksheet.merge_cells('H8:M8')
+
+    columns = acadify.SpreadsheetExports.GRADE_SHEET_COLUMNS
+    header_row = acadify.SpreadsheetExports.GRADE_SHEET_HEADER_ROW
+    for row_number, values in enumerate([[field for field, _, _ in columns]] + rows, header_row):
+        for (field, first, last), value in zip(columns, values):
+            cell = worksheet[f'{first}{row_number}']
+            cell.value = value
+            cell.border = box
+            cell.alignment = center if first == last else spread
+            if first != last:
+                worksheet[f'{last}{row_number}'].alignment = spread
+                worksheet[f'{last}{row_number}'].border = box
+
+    output = io.BytesIO()
+    workbook.save(output)
+    return len(rows), len(output.getvalue())
+
+
+def run_one(args):
+    """Export once in this process and print its measurements as JSON"""
+    acadify = benchlib.load_main(args, EXPORT_CACHE_DIR=args.cache_dir)
+    with acadify.app.app_context():
+        registrar = acadify.User.query.filter_by(role='registrar').first()
+        client = benchlib.client_as(acadify, registrar)
+    # First-request hooks, the login lookup and openpyxl's imports are not part of the export
+    client.get('/dashboard')
+    import openpyxl.styles  # noqa: F401
+    rss_before = benchlib.peak_rss_mb()
+
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        if args.mode == 'naive':
+            with acadify.app.app_context():
+                rows, size = naive_grade_sheet(acadify)
+        else:
+            response = client.get('/registrar/grade-sheet/export', query_string=TERM)
+            assert response.status_code == 200, response.status_code
+            rows, size = None, len(response.get_data())
+    seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        'mode': args.mode, 'rows': rows, 'seconds': round(seconds, 2), 'peak_rss_mb': benchlib.peak_rss_mb(),
+        'rss_growth_mb': round(benchlib.peak_rss_mb() - rss_before, 1), 'kb': size // 1024
+    }))
+
+
+def main():
+    parser = benchlib.argument_parser(__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=7200)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--cache-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        return run_one(args)
+
+    work_dir = tempfile.mkdtemp(prefix='acadify-bench-')
+    args.db = args.db or os.path.join(work_dir, 'bench.db')
+    acadify = benchlib.load_main(args)
+    with acadify.app.app_context():
+        if not acadify.Grade.query.first():
+            benchlib.seed_term(acadify, args.students, **TERM)
+        grades = acadify.Grade.query.count()
+    print(f"{grades} grade rows")
+
+    cache_dir = os.path.join(work_dir, 'exports')
+    print(f"{'mode':>9} {'seconds':>8} {'peak MB':>8} {'growth MB':>10} {'KB':>6}")
+    for mode in MODES:
+        command = [sys.executable, os.path.abspath(__file__), '--mode', mode, '--db', args.db, '--cache-dir', cache_dir]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>9} {result['seconds']:>8} {result['peak_rss_mb']:>8} {result['rss_growth_mb']:>10} {result['kb']:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Grade sheet saves: milliseconds and SQL statements per /api/save-grades call.
+
+Builds a class of --students enrolled students (and a --batch-student one for the large
+batch) under an open encoding schedule, then saves each sheet three ways as the
+encoding page's autosave does: every grade new, every grade changed, and the same
+sheet resent unchanged. The final grade rows are printed as a checksum, so a before
+and an after run can be compared for identical results too.
+
+    python scripts/bench_grade_upsert.py                      # prefetch and upsert (after)
+    python scripts/bench_grade_upsert.py --baseline cc8b3d2^  # one lookup per row (before)
+"""
+import hashlib
+import io
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+import benchlib
+
+TERM = {'academic_year': '2024-2025', 'semester': 1}
+
+
+def seed_class(acadify, instructor, code, students):
+    """A subject assigned to ``instructor`` with ``students`` enrolled students; returns (subject id, student ids)"""
+    db = acadify.db
+    subject = acadify.Subject(subject_code=code, subject_name=f'Subject {code}', subject_type='Academic', units=3,
+                              department='BSIT', year_level=1, section='A', instructor_id=instructor.id, **TERM)
+    db.session.add(subject)
+    db.session.flush()
+    db.session.add(acadify.ClassAssignment(subject_id=subject.id, instructor_id=instructor.id, school_year=TERM['academic_year'],
+                                           semester=TERM['semester'], section='A'))
+    student_ids = []
+    for n in range(students):
+        student = acadify.Student(username=f'{code}_{n}', email=f'{code}_{n}@example.com', password_hash='x',
+                                  student_id=f'{code}-{n:05d}', first_name=f'First{n}', last_name=f'Last{n:05d}',
+                                  department='BSIT', year_level=1, section='A', section_type='Block Section', **TERM)
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(acadify.StudentSubject(student_id=student.id, subject_id=subject.id, status='ENROLLED', **TERM))
+        student_ids.append(student.id)
+    db.session.commit()
+    return subject.id, student_ids
+
+
+def sheet(student_ids, offset):
+    """The grades payload the encoding page sends, with every grade shifted by ``offset``"""
+    return [{'student_id': student_id, 'prelim': 75 + (n + offset) % 20, 'midterm': 78 + (n + offset) % 18,
+             'final': 80 + (n + offset) % 15} for n, student_id in enumerate(student_ids)]
+
+
+def grade_checksum(acadify):
+    """Digest of every grade row's values, independent of row ids"""
+    Grade = acadify.Grade
+    with acadify.app.app_context():
+        rows = acadify.db.session.query(
+            Grade.student_id, Grade.subject_id, Grade.prelim_grade, Grade.midterm_grade, Grade.final_grade,
+            Grade.final_average, Grade.equivalent_grade, Grade.remarks, Grade.is_complete
+        ).order_by(Grade.subject_id, Grade.student_id).all()
+    return len(rows), hashlib.sha1(repr([tuple(row) for row in rows]).encode()).hexdigest()[:12]
+
+
+def main():
+    parser = benchlib.argument_parser(__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=60)
+    parser.add_argument('--batch-students', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5, help='saves per measurement; the median is shown')
+    args = parser.parse_args()
+
+    acadify = benchlib.load_main(args)
+    db = acadify.db
+    with acadify.app.app_context():
+        registrar = acadify.User(username='bench_registrar', email='bench_registrar@example.com', password_hash='x',
+                                 role='registrar', first_name='Registrar', last_name='Bench')
+        db.session.add(registrar)
+        db.session.flush()
+        db.session.add(acadify.GradeEncodingSchedule(start_date=datetime.now() - timedelta(days=1),
+                                                     end_date=datetime.now() + timedelta(days=1), department='BSIT',
+                                                     grading_period='all', status='active', created_by=registrar.id, **TERM))
+        instructor = acadify.User(username='bench_instructor', email='bench_instructor@example.com', password_hash='x',
+                                  role='instructor', first_name='Instructor', last_name='Bench', department='BSIT')
+        db.session.add(instructor)
+        db.session.commit()
+        classes = [(f'{args.students}-student class', seed_class(acadify, instructor, 'CLS', args.students)),
+                   (f'{args.batch_students}-row batch', seed_class(acadify, instructor, 'BAT', args.batch_students))]
+        client = benchlib.client_as(acadify, instructor)
+
+    queries = benchlib.QueryCounter(acadify)
+
+    def save(subject_id, grades):
+        queries.reset()
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            response = client.post('/api/save-grades', json={'subject_id': subject_id, 'grades': grades})
+        seconds = time.perf_counter() - start
+        assert response.status_code == 200, (response.status_code, response.get_data(as_text=True)[:200])
+        return seconds * 1000, queries.count
+
+    print(f"{'save':34s} {'ms':>8} {'queries':>8}")
+    for label, (subject_id, student_ids) in classes:
+        # Each run saves new rows once, then alternates two versions of the sheet so every save changes them all
+        runs = [('new rows', [save(subject_id, sheet(student_ids, 0))])]
+        changed = [save(subject_id, sheet(student_ids, 1 + n % 2)) for n in range(args.repeat)]
+        unchanged = [save(subject_id, sheet(student_ids, 1 + args.repeat % 2)) for _ in range(args.repeat)]
+        runs += [('all changed', changed), ('unchanged', unchanged)]
+        for case, results in runs:
+            milliseconds = sorted(ms for ms, _ in results)[len(results) // 2]
+            print(f"{label + ', ' + case:34s} {milliseconds:>8.1f} {results[-1][1]:>8}")
+
+    rows, digest = grade_checksum(acadify)
+    print(f"{rows} grade rows, checksum {digest}")
+
+
+if __name__ == '__main__':
+    main()
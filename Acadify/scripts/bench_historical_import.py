@@ -0,0 +1,128 @@
+"""Historical grade import: rows per second and peak memory for CSV and XLSX uploads.
+
+Seeds 2,000 students and 25 subjects, writes a grade file of each requested size and
+format (1% unknown students, 5% rows without a final grade), and uploads it as a
+registrar. A queued import job is run inline. Every upload runs in its own process so
+peak RSS is its own.
+
+    python scripts/bench_historical_import.py                          # after
+    python scripts/bench_historical_import.py --baseline ef61031^      # before
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import benchlib
+
+HEADERS = ['student_id', 'subject_code', 'semester', 'academic_year', 'prelim_grade', 'midterm_grade', 'final_grade']
+
+
+def write_grade_file(path, rows, file_format, students=2000, subjects=25):
+    rnd = random.Random(rows)
+    data = []
+    for _ in range(rows):
+        roll = rnd.random()
+        student = f'B{rnd.randrange(students):06d}' if roll > 0.01 else 'UNKNOWN'
+        final = None if roll < 0.05 else round(rnd.uniform(70, 99), 1)
+        data.append([student, f'HIST{rnd.randrange(subjects):03d}', rnd.choice([1, 2]),
+                     rnd.choice(['2022-2023', '2023-2024', '2024-2025']),
+                     round(rnd.uniform(70, 99), 1), round(rnd.uniform(70, 99), 1), final])
+    if file_format == 'csv':
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADERS)
+            writer.writerows(['' if value is None else value for value in row] for row in data)
+    else:
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(HEADERS)
+        for row in data:
+            sheet.append(row)
+        workbook.save(path)
+
+
+def seed_catalog(acadify, students=2000, subjects=25):
+    db = acadify.db
+    with acadify.app.app_context():
+        registrar = acadify.User(username='bench_registrar', email='bench_registrar@example.com', password_hash='x',
+                                 role='registrar', first_name='Registrar', last_name='Bench')
+        db.session.add(registrar)
+        db.session.execute(db.insert(acadify.Student), [
+            dict(username=f'bench{n}', email=f'bench{n}@example.com', password_hash='x', student_id=f'B{n:06d}',
+                 first_name=f'First{n}', last_name=f'Last{n}', department='BSIT', year_level=1, semester=1,
+                 section='A', section_type='Block Section', academic_year='2024-2025')
+            for n in range(students)
+        ])
+        db.session.execute(db.insert(acadify.Subject), [
+            dict(subject_code=f'HIST{n:03d}', subject_name=f'Subject {n}', subject_type='Academic', units=3,
+                 department='BSIT', year_level=1, semester=1, academic_year='2024-2025')
+            for n in range(subjects)
+        ])
+        db.session.commit()
+        return db.session.get(acadify.User, registrar.id)
+
+
+def run_one(args):
+    """Import one file in this process and print its measurements as JSON"""
+    acadify = benchlib.load_main(args, IMPORT_JOB_WORKERS='0')
+    registrar = seed_catalog(acadify)
+    path = os.path.join(tempfile.mkdtemp(prefix='acadify-bench-'), f'grades.{args.format}')
+    write_grade_file(path, args.rows, args.format)
+    client = benchlib.client_as(acadify, registrar)
+    rss_before = benchlib.peak_rss_mb()
+
+    start = time.perf_counter()
+    with open(path, 'rb') as upload, redirect_stdout(io.StringIO()):
+        response = client.post('/api/import-historical-grades', data={'file': (upload, os.path.basename(path))},
+                               content_type='multipart/form-data')
+        result = response.json
+        if 'job_id' in result:
+            # Queued: run the job here instead of on a worker thread
+            with acadify.app.app_context():
+                acadify.import_job_runner._process(result['job_id'])
+                job = acadify.db.session.get(acadify.ImportJob, result['job_id'])
+                result = {'created': job.created_count, 'updated': job.updated_count, 'errors': job.error_count}
+    seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        'rows': args.rows, 'format': args.format, 'seconds': round(seconds, 2),
+        'rows_per_sec': int(args.rows / seconds), 'peak_rss_mb': benchlib.peak_rss_mb(),
+        'rss_growth_mb': round(benchlib.peak_rss_mb() - rss_before, 1),
+        'created': result.get('created'), 'updated': result.get('updated'), 'errors': result.get('errors')
+    }))
+
+
+def main():
+    parser = benchlib.argument_parser(__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--format', nargs='+', choices=['csv', 'xlsx'], default=['csv', 'xlsx'])
+    parser.add_argument('--one', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one:
+        args.rows, args.format = args.rows[0], args.format[0]
+        return run_one(args)
+
+    print(f"{'rows':>7} {'format':>6} {'rows/s':>7} {'peak MB':>8} {'growth MB':>10} {'created':>8} {'updated':>8} {'errors':>7}")
+    for rows in args.rows:
+        for file_format in args.format:
+            command = [sys.executable, os.path.abspath(__file__), '--one', '--rows', str(rows), '--format', file_format]
+            if args.baseline:
+                command += ['--baseline', args.baseline]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{rows:>7} {file_format:>6} {result['rows_per_sec']:>7} {result['peak_rss_mb']:>8} "
+                  f"{result['rss_growth_mb']:>10} {result['created']:>8} {result['updated']:>8} {result['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Promotion report: SQL statements and latency per page load at several cohort sizes.
+
+Seeds one term of first-year students with 10 subjects each, then loads
+/registrar/promotion-report as a registrar. Templates are not rendered, so the time
+is the report's queries and assembly.
+
+    python scripts/bench_promotion_report.py                                   # after
+    python scripts/bench_promotion_report.py --baseline 1e4b3d0^ 100 1000      # before
+"""
+import time
+
+import benchlib
+
+
+def main():
+    parser = benchlib.argument_parser(__doc__.splitlines()[0])
+    parser.add_argument('sizes', nargs='*', type=int, default=[100, 1000, 5000], help='students per run')
+    parser.add_argument('--subjects', type=int, default=10)
+    args = parser.parse_args()
+
+    acadify = benchlib.load_main(args)
+    context = benchlib.stub_templates(acadify)
+    queries = benchlib.QueryCounter(acadify)
+
+    print(f"{'students':>8} {'queries':>8} {'seconds':>8} {'promoted':>9} {'retained':>9}")
+    for size in args.sizes:
+        benchlib.reset_database(acadify)
+        staff = benchlib.seed_term(acadify, size, subjects=args.subjects)
+        client = benchlib.client_as(acadify, staff['registrar'])
+        url = '/registrar/promotion-report?semester=1&academic_year=2024-2025&applied=true'
+        # Warm the login and lookup caches so only the report itself is measured
+        client.get(url)
+
+        queries.reset()
+        start = time.perf_counter()
+        response = client.get(url)
+        seconds = time.perf_counter() - start
+        assert response.status_code == 200, response.status_code
+        assert len(context['promotion_data']) == size
+        print(f"{size:>8} {queries.count:>8} {seconds:>8.2f} {context['promoted_count']:>9} {context['retained_count']:>9}")
+
+
+if __name__ == '__main__':
+    main()
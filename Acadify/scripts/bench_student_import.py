@@ -0,0 +1,69 @@
+"""Student import: students per second and SQL statements at several password-hashing pool sizes.
+
+Uploads a CSV of new students through /api/import-students as a registrar, on an
+empty database each time, and runs the queued import job inline with
+STUDENT_IMPORT_HASH_WORKERS set to each requested size. Password hashing dominates,
+so the pool only helps up to the number of CPUs.
+
+    python scripts/bench_student_import.py --workers 1 4 8        # after
+    python scripts/bench_student_import.py --baseline f63ab42^     # before (no pool)
+"""
+import io
+import os
+import time
+from contextlib import redirect_stdout
+
+import benchlib
+
+
+def student_csv(rows):
+    lines = ['username,email,password,first_name,last_name,student_id,department,year_level,semester']
+    lines += [f'new{n},new{n}@example.com,Secret{n}!,First{n},Last{n},N{n:06d},BSIT,1,1' for n in range(rows)]
+    return '\n'.join(lines).encode()
+
+
+def main():
+    parser = benchlib.argument_parser(__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=400)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    acadify = benchlib.load_main(args, IMPORT_JOB_WORKERS='0')
+    queries = benchlib.QueryCounter(acadify)
+    pooled = 'STUDENT_IMPORT_HASH_WORKERS' in acadify.app.config
+    data = student_csv(args.rows)
+
+    print(f"CPUs: {os.cpu_count()}")
+    print(f"{'workers':>7} {'students':>8} {'seconds':>8} {'students/s':>10} {'queries':>8}")
+    for workers in args.workers if pooled else [None]:
+        benchlib.reset_database(acadify)
+        with acadify.app.app_context():
+            registrar = acadify.User(username='bench_registrar', email='bench_registrar@example.com', password_hash='x',
+                                     role='registrar', first_name='Registrar', last_name='Bench')
+            acadify.db.session.add(registrar)
+            acadify.db.session.commit()
+            client = benchlib.client_as(acadify, registrar)
+        if pooled:
+            acadify.app.config['STUDENT_IMPORT_HASH_WORKERS'] = workers
+
+        # First-request hooks and login lookups are not part of the import
+        client.get('/dashboard')
+        queries.reset()
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            result = client.post('/api/import-students', data={'file': (io.BytesIO(data), 'students.csv')},
+                                 content_type='multipart/form-data').json
+            if 'job_id' in result:
+                # Queued: run the job here instead of on a worker thread
+                with acadify.app.app_context():
+                    acadify.import_job_runner._process(result['job_id'])
+                    result = {'created': acadify.db.session.get(acadify.ImportJob, result['job_id']).created_count}
+        seconds = time.perf_counter() - start
+
+        created = result.get('created') or 0
+        assert created == args.rows, result
+        print(f"{workers or '-':>7} {created:>8} {seconds:>8.1f} {created / seconds:>10.1f} {queries.count:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""Shared plumbing for the bench_*.py scripts: load Acadify on a scratch SQLite database and measure it.
+
+Each script seeds its own data, so nothing here touches the configured MySQL database.
+``--baseline REF`` runs the same measurement against main.py as it was at a git ref,
+for the "before" half of a comparison.
+"""
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+ACADIFY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(ACADIFY_DIR)
+
+# Older trees only knew the MySQL URL; the baseline copy is pointed at the scratch database
+_MYSQL_URI_LINE = "app.config['SQLALCHEMY_DATABASE_URI'] = f'mysql+pymysql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'"
+
+
+def argument_parser(description):
+    """ArgumentParser with the options every bench script takes"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--baseline', metavar='REF', help='measure main.py as of this git ref instead of the working tree')
+    parser.add_argument('--db', metavar='PATH', help='SQLite file to use (default: a fresh temporary file)')
+    return parser
+
+
+def load_main(args, **environ):
+    """Import Acadify's main module on a scratch SQLite database, with background threads off"""
+    work_dir = tempfile.mkdtemp(prefix='acadify-bench-')
+    db_path = args.db or os.path.join(work_dir, 'bench.db')
+    os.environ.update({
+        'DATABASE_URI': f'sqlite:///{db_path}',
+        'ENCODING_SCHEDULER_ENABLED': '0',
+        'ROLLUP_ENABLED': '0',
+        'SSE_ENABLED': '0',
+        'AUDIT_LOG_MODE': 'sync',
+    })
+    for name in ('IMPORT_JOB_DIR', 'AUDIT_SPILL_DIR', 'AUDIT_ARCHIVE_DIR', 'RESOURCE_SAMPLE_DIR', 'SSE_SOCKET_DIR', 'EXPORT_CACHE_DIR'):
+        os.environ[name] = os.path.join(work_dir, name.lower())
+    os.environ.update(environ)
+
+    source_dir = ACADIFY_DIR
+    if args.baseline:
+        # Check the old tree out beside the scratch database, templates and all
+        source_dir = os.path.join(work_dir, 'Acadify')
+        archive = subprocess.run(['git', '-C', REPO_DIR, 'archive', args.baseline, 'Acadify'], check=True, capture_output=True).stdout
+        subprocess.run(['tar', '-x', '-C', work_dir], input=archive, check=True)
+        main_path = os.path.join(source_dir, 'main.py')
+        with open(main_path) as f:
+            source = f.read()
+        source = source.replace(_MYSQL_URI_LINE, f"app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///{db_path}'")
+        with open(main_path, 'w') as f:
+            f.write(source)
+
+    sys.path.insert(0, source_dir)
+    import main
+    with main.app.app_context():
+        main.db.create_all()
+    return main
+
+
+class QueryCounter:
+    """Counts SQL statements sent through the app's engine"""
+
+    def __init__(self, main):
+        self.count = 0
+        with main.app.app_context():
+            engine = main.db.engine
+        main.db.event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+@contextmanager
+def timed(results, key):
+    """Store the seconds the block took in ``results[key]``"""
+    start = time.perf_counter()
+    yield
+    results[key] = round(time.perf_counter() - start, 3)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def client_as(main, account):
+    """Flask test client logged in as a User or Student"""
+    client = main.app.test_client()
+    prefix = 'student' if isinstance(account, main.Student) else 'user'
+    with client.session_transaction() as session:
+        session['_user_id'] = f'{prefix}_{account.id}'
+        session['_fresh'] = True
+    return client
+
+
+def stub_templates(main):
+    """Skip template rendering; returns the dict the last render_template call received"""
+    captured = {}
+
+    def render_template(template, **context):
+        captured.clear()
+        captured.update(context)
+        return 'ok'
+
+    main.render_template = render_template
+    return captured
+
+
+def reset_database(main):
+    """Empty every table, for a script that measures several data sizes in one process"""
+    with main.app.app_context():
+        main.db.drop_all()
+        main.db.create_all()
+
+
+def seed_term(main, students, subjects=8, academic_year='2024-2025', semester=1, seed=1):
+    """One term of a BSIT first-year cohort: staff, subjects, assignments, enrollments and grades.
+
+    Returns a dict of the staff accounts by role. Grades are left out for about one
+    student-subject in ten, so reports see incomplete records too.
+    """
+    rnd = random.Random(seed)
+    db = main.db
+    with main.app.app_context():
+        staff = {}
+        for role in ('registrar', 'instructor', 'mis_it', 'dean'):
+            staff[role] = main.User(username=f'bench_{role}', email=f'bench_{role}@example.com', password_hash='x',
+                                    role=role, first_name=role.title(), last_name='Bench', department='BSIT')
+            db.session.add(staff[role])
+        db.session.flush()
+
+        subject_rows = []
+        for n in range(subjects):
+            subject = main.Subject(subject_code=f'IT{100 + n}', subject_name=f'Subject {n}',
+                                   subject_type='Academic' if n < subjects - 2 else 'Non Academic', units=3,
+                                   department='BSIT', year_level=1, semester=semester, section='A',
+                                   academic_year=academic_year, instructor_id=staff['instructor'].id)
+            db.session.add(subject)
+            subject_rows.append(subject)
+        db.session.flush()
+        for subject in subject_rows:
+            db.session.add(main.ClassAssignment(subject_id=subject.id, instructor_id=staff['instructor'].id,
+                                                school_year=academic_year, semester=semester, section='A'))
+
+        for n in range(students):
+            student = main.Student(username=f'bench{n}', email=f'bench{n}@example.com', password_hash='x',
+                                   student_id=f'B{n:06d}', first_name=f'First{n}', last_name=f'Last{n:06d}',
+                                   department='BSIT', year_level=1, semester=semester, section='A',
+                                   section_type='Block Section' if n % 5 else 'Irregular', academic_year=academic_year)
+            db.session.add(student)
+            db.session.flush()
+            db.session.add(main.StudentEnrollment(student_id=student.id, academic_year=academic_year, semester=semester,
+                                                  year_level=1, section='A'))
+            for subject in subject_rows:
+                db.session.add(main.StudentSubject(student_id=student.id, subject_id=subject.id,
+                                                   academic_year=academic_year, semester=semester, status='ENROLLED'))
+                if rnd.random() < 0.9:
+                    average = round(rnd.uniform(70, 99), 2)
+                    equivalent, remarks = main.calculate_grade_equivalent(average)
+                    db.session.add(main.Grade(student_id=student.id, subject_id=subject.id, prelim_grade=average,
+                                              midterm_grade=average, final_grade=average, final_average=average,
+                                              equivalent_grade=equivalent, remarks=remarks, semester=semester,
+                                              academic_year=academic_year, is_complete=True))
+            if n % 500 == 499:
+                db.session.commit()
+        db.session.commit()
+        return {role: db.session.get(main.User, user.id) for role, user in staff.items()}
@@ -0,0 +1,130 @@
+"""Shared fixtures: the Acadify app on a throwaway SQLite database, with background threads off"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+_db_dir = tempfile.mkdtemp(prefix='acadify-tests-')
+# ACADIFY_TEST_DATABASE_URI runs the suite on a scratch MySQL database instead (it is emptied)
+os.environ['DATABASE_URI'] = os.environ.get('ACADIFY_TEST_DATABASE_URI', f"sqlite:///{os.path.join(_db_dir, 'acadify.db')}")
+os.environ['ENCODING_SCHEDULER_ENABLED'] = '0'
+os.environ['ROLLUP_ENABLED'] = '0'
+os.environ['SSE_ENABLED'] = '0'
+os.environ['AUDIT_LOG_MODE'] = 'sync'
+os.environ['IMPORT_JOB_WORKERS'] = '0'
+for name in ('IMPORT_JOB_DIR', 'AUDIT_SPILL_DIR', 'AUDIT_ARCHIVE_DIR', 'RESOURCE_SAMPLE_DIR', 'SSE_SOCKET_DIR', 'EXPORT_CACHE_DIR'):
+    os.environ[name] = os.path.join(_db_dir, name.lower())
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """Application context over empty tables; per-process caches start cold"""
+    main.app.config['TESTING'] = True
+    with main.app.app_context():
+        main.db.drop_all(bind_key=None)
+        main.db.create_all(bind_key=None)
+        main.identity_cache.invalidate()
+        main.encoding_window_resolver.invalidate()
+        main._change_feed_head.update(cursor=None, checked_at=0.0)
+        main._change_feed_start.update(cursor=None, checked_at=0.0)
+        main.grade_sheet_query.__init__()
+        main.audit_log_search.__init__()
+        main._grade_upsert_key.update(present=False, checked=True)
+        yield main.app
+        main.db.session.remove()
+
+
+@pytest.fixture
+def make(app):
+    """Factories for the rows most tests need; each returns the flushed model"""
+    class Factory:
+        counter = 0
+
+        def _next(self):
+            Factory.counter += 1
+            return Factory.counter
+
+        def user(self, role='registrar', **fields):
+            n = self._next()
+            fields = dict(username=f'{role}{n}', email=f'{role}{n}@example.com', password_hash='x',
+                          role=role, first_name=role.title(), last_name=f'User{n}', **fields)
+            return self._add(main.User(**fields))
+
+        def subject(self, academic_year='2024-2025', semester=1, **fields):
+            n = self._next()
+            fields = dict(dict(subject_code=f'SUB{n:04d}', subject_name=f'Subject {n}', subject_type='Academic', units=3,
+                               department='BSCS', year_level=1, semester=semester, academic_year=academic_year), **fields)
+            return self._add(main.Subject(**fields))
+
+        def student(self, academic_year='2024-2025', semester=1, **fields):
+            n = self._next()
+            fields = dict(dict(username=f'student{n}', email=f'student{n}@example.com', password_hash='x',
+                               student_id=f'2024-{n:05d}', first_name=f'First{n}', last_name=f'Last{n}',
+                               department='BSCS', year_level=1, semester=semester, section='A',
+                               section_type='Block Section', academic_year=academic_year), **fields)
+            return self._add(main.Student(**fields))
+
+        def grade(self, student, subject, final_average=None, **fields):
+            if final_average is not None:
+                equivalent, remarks = main.calculate_grade_equivalent(final_average)
+                fields = dict(dict(prelim_grade=final_average, midterm_grade=final_average, final_grade=final_average,
+                                   equivalent_grade=equivalent, remarks=remarks, is_complete=True), **fields)
+            fields = dict(dict(student_id=student.id, subject_id=subject.id, final_average=final_average,
+                               semester=subject.semester, academic_year=subject.academic_year), **fields)
+            return self._add(main.Grade(**fields))
+
+        @staticmethod
+        def _add(row):
+            main.db.session.add(row)
+            main.db.session.flush()
+            return row
+
+    return Factory()
+
+
+@pytest.fixture
+def client_as(app):
+    """Test client logged in as a User or Student"""
+    def client_as(account):
+        client = main.app.test_client()
+        prefix = 'student' if isinstance(account, main.Student) else 'user'
+        with client.session_transaction() as session:
+            session['_user_id'] = f'{prefix}_{account.id}'
+            session['_fresh'] = True
+        return client
+    return client_as
+
+
+@pytest.fixture
+def replica(app, make, monkeypatch, tmp_path):
+    """A second SQLite database as the 'replica' bind; set replica.down to make connecting fail"""
+    class Replica:
+        down = False
+
+    def connect():
+        if Replica.down:
+            raise sqlite3.OperationalError('unable to open database file')
+        return sqlite3.connect(str(tmp_path / 'replica.db'))
+
+    engine = create_engine('sqlite://', creator=connect, poolclass=NullPool)
+    main.db.metadata.create_all(engine)
+    monkeypatch.setitem(main.db.engines, 'replica', engine)
+    monkeypatch.setattr(main, 'REPLICA_URI', 'sqlite:///replica')
+    Replica.router = main.ReplicaRouter(main.app)
+    monkeypatch.setattr(main, 'replica_router', Replica.router)
+
+    # Only the primary has this student, so answers show which bind they came from
+    make.student()
+    main.db.session.commit()
+    main.db.session.remove()
+    yield Replica
+    main.db.session.remove()
+    engine.dispose()
@@ -0,0 +1,151 @@
+"""Audit log archive: months moved out of the live table, checked, and searched like it"""
+import glob
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+from main import AuditLog, db
+
+
+@pytest.fixture
+def archive(app, monkeypatch, tmp_path):
+    monkeypatch.setitem(main.app.config, 'AUDIT_ARCHIVE_DIR', str(tmp_path))
+    monkeypatch.setattr(main, 'AUDIT_LOG_PAGE_SIZE', 3)
+    return main.audit_log_archive
+
+
+@pytest.fixture
+def logs(make):
+    """Entries over the three months before the live window, a few per day, and one live entry; oldest first"""
+    users = [make.user(), make.user('instructor')]
+    users[1].username = 'bob'
+    cutoff = main.audit_archive_cutoff(main.AUDIT_ARCHIVE_MIN_RETENTION_DAYS)
+    first_day = datetime(cutoff.year - (cutoff.month <= 3), (cutoff.month - 4) % 12 + 1, 1)
+    for n in range(30):
+        db.session.add(AuditLog(
+            user_id=users[n % 2].id, action=['login', 'export'][n % 3 == 0], status='failed' if n % 5 == 0 else 'success',
+            description=f"Entry {n} about the {['alpha', 'beta', 'gamma', 'delta'][n % 4]} report", ip_address='10.0.0.1',
+            created_at=first_day + timedelta(days=n * 3, hours=n % 2)
+        ))
+    db.session.add(AuditLog(action='login', description='Still live', created_at=datetime.utcnow()))
+    db.session.commit()
+    return [(log.id, log.created_at, log.description) for log in
+            AuditLog.query.filter(AuditLog.created_at < cutoff).order_by(AuditLog.created_at, AuditLog.id)]
+
+
+def run(*args):
+    result = main.app.test_cli_runner().invoke(args=list(args))
+    return result.exit_code, result.output
+
+
+def live_descriptions():
+    db.session.expire_all()
+    return [log.description for log in AuditLog.query]
+
+
+def archived(page):
+    return [(log.id, log.created_at, log.description) for log in page.items]
+
+
+def test_archive_command_moves_old_months_and_checks_them(archive, logs):
+    assert run('archive-audit-log', '--retention-days', '10')[0] == 2
+    code, output = run('archive-audit-log', '--retention-days', '31', '--dry-run')
+    assert (code, output.split()[0]) == (0, str(len(logs)))
+    assert len(live_descriptions()) == len(logs) + 1
+
+    code, output = run('archive-audit-log', '--retention-days', '31')
+    assert code == 0, output
+    assert live_descriptions() == ['Still live']
+    assert sum(member['rows'] for month in archive.months() for member in archive.load_index(month)['members']) == len(logs)
+    assert archive.horizon() == main.audit_archive_cutoff(31)
+    assert run('check-audit-archive') == (0, ''.join(
+        f"{month}: {sum(member['rows'] for member in archive.load_index(month)['members'])} rows OK\n"
+        for month in archive.months()
+    ))
+
+    # Nothing is archived twice
+    assert run('archive-audit-log', '--retention-days', '31')[1].startswith('Archived 0 rows')
+
+
+def test_check_reports_a_damaged_member(archive, logs):
+    archive.archive(main.audit_archive_cutoff(31))
+    path = sorted(glob.glob(f"{main.app.config['AUDIT_ARCHIVE_DIR']}/*.ndjson.gz"))[0]
+    with open(path, 'r+b') as data_file:
+        data_file.seek(20)
+        byte = data_file.read(1)
+        data_file.seek(20)
+        data_file.write(bytes([byte[0] ^ 0xFF]))
+
+    code, output = run('check-audit-archive')
+    assert code == 1
+    assert 'checksum mismatch' in output
+
+
+def test_interrupted_run_is_finished_without_duplicates(archive, logs):
+    cutoff = main.audit_archive_cutoff(31)
+    rows = [{column.name: getattr(log, column.name) for column in AuditLog.__table__.columns}
+            for log in AuditLog.query.filter(AuditLog.created_at < cutoff)]
+    archive.archive(cutoff)
+
+    # A run that stopped after writing its members but before deleting, and one that left a torn tail
+    with db.engine.begin() as connection:
+        connection.execute(AuditLog.__table__.insert(), rows[:5])
+    month = archive.months()[0]
+    with open(archive._paths(month)[0], 'ab') as data_file:
+        data_file.write(b'\x1f\x8b torn')
+
+    assert archive.archive(cutoff) == {month: 5}
+    assert live_descriptions() == ['Still live']
+    assert archive.check(month) == []
+    page = archive.page({'date_from': datetime.strptime(month, '%Y-%m'), 'date_to': archive.horizon()})
+    assert page.total == len(logs)
+
+
+def test_archive_search_pages_like_the_live_table(archive, logs):
+    archive.archive(main.audit_archive_cutoff(31))
+
+    pages = [archive.page({})]
+    while pages[-1].older_cursor:
+        pages.append(archive.page({}, after=pages[-1].older_cursor))
+    assert [entry for page in pages for entry in archived(page)] == logs[::-1]
+    assert (pages[0].total, pages[0].total_exact) == (len(logs), True)
+
+    back = pages[-1]
+    for expected in reversed(pages[1:-1]):
+        back = archive.page({}, before=back.newer_cursor)
+        assert archived(back) == archived(expected)
+    assert archived(archive.page({}, before=pages[1].newer_cursor)) == archived(pages[0])
+
+
+@pytest.mark.parametrize('filters, expected', [
+    ({'action': 'export'}, lambda n: n % 3 == 0),
+    ({'action': 'export', 'status': 'failed'}, lambda n: n % 15 == 0),
+    ({'user': 'bob'}, lambda n: n % 2 == 1),
+    # Every word, in any order
+    ({'q': 'report gamma'}, lambda n: n % 4 == 2),
+])
+def test_archive_filters_match_the_index_and_the_rows(archive, logs, filters, expected):
+    archive.archive(main.audit_archive_cutoff(31))
+    matches = [entry for entry in logs[::-1] if expected(int(entry[2].split()[1]))]
+
+    seen, cursor = [], None
+    while True:
+        page = archive.page(filters, after=cursor)
+        seen += archived(page)
+        cursor = page.older_cursor
+        if not cursor:
+            break
+    assert seen == matches
+    assert archive.count(filters) == (len(matches), True)
+
+
+def test_audit_log_page_searches_the_archive(archive, logs, make, client_as):
+    archive.archive(main.audit_archive_cutoff(31))
+    client = client_as(make.user('mis_it'))
+    db.session.commit()
+
+    html = client.get('/misit/audit-logs', query_string={'source': 'archive', 'q': 'delta'}).get_data(as_text=True)
+    assert 'Entry 27 about the delta report' in html and 'Still live' not in html
+    html = client.get('/misit/audit-logs').get_data(as_text=True)
+    assert 'Still live' in html and 'delta' not in html
@@ -0,0 +1,131 @@
+"""Audit log search: keyset pages over (created_at, id), filters and the capped count"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+from main import AuditLog, db
+
+START = datetime(2025, 3, 10, 8, 0)
+
+
+@pytest.fixture
+def page_size(monkeypatch):
+    monkeypatch.setattr(main, 'AUDIT_LOG_PAGE_SIZE', 3)
+    return 3
+
+
+def add_logs(make, count=10):
+    """``count`` entries, two per timestamp so the id has to break ties; returns them newest first"""
+    users = [make.user(), make.user('instructor')]
+    users[0].username, users[1].username = 'alice_100%', 'bob'
+    for n in range(count):
+        db.session.add(AuditLog(
+            user_id=users[n % 2].id, action=['login', 'login_failed'][n % 3 == 0],
+            status='failed' if n % 3 == 0 else 'success', description=f'Entry {n} for grade sheet {n % 4}',
+            created_at=START + timedelta(minutes=n // 2)
+        ))
+    db.session.commit()
+    return AuditLog.query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).all()
+
+
+def ids(page):
+    return [log.id for log in page.items]
+
+
+def test_walking_older_then_newer_visits_every_entry_once(make, page_size):
+    logs = add_logs(make)
+    search = main.audit_log_search
+
+    pages = [search.page({})]
+    assert pages[0].newer_cursor is None
+    while pages[-1].older_cursor:
+        pages.append(search.page({}, after=pages[-1].older_cursor))
+    assert [ids(page) for page in pages] == [[log.id for log in logs[n:n + 3]] for n in range(0, 10, 3)]
+    assert pages[-1].older_cursor is None
+
+    # Back up from the oldest page, one page at a time
+    back = pages[-1]
+    for expected in reversed(pages[1:-1]):
+        back = search.page({}, before=back.newer_cursor)
+        assert ids(back) == ids(expected)
+    assert (back.newer_cursor, back.older_cursor) == (pages[1].newer_cursor, pages[1].older_cursor)
+
+
+def test_newer_page_near_the_top_is_a_full_first_page(make, page_size):
+    logs = add_logs(make)
+    # Only two entries are newer than the third one; the first page is shown instead
+    page = main.audit_log_search.page({}, before=main.AuditLogSearch.encode_cursor(logs[2]))
+    assert ids(page) == [log.id for log in logs[:3]]
+    assert page.newer_cursor is None
+
+
+@pytest.mark.parametrize('cursor', ['', 'garbage', '20250310-x'])
+def test_malformed_cursor_shows_the_first_page(make, page_size, cursor):
+    logs = add_logs(make)
+    assert ids(main.audit_log_search.page({}, after=cursor, before=cursor)) == [log.id for log in logs[:3]]
+
+
+@pytest.mark.parametrize('filters, expected', [
+    ({'action': 'login'}, lambda log: log.action == 'login'),
+    ({'status': 'failed'}, lambda log: log.status == 'failed'),
+    # The user filter is a substring, with LIKE wildcards taken literally
+    ({'user': '100%'}, lambda log: log.user.username == 'alice_100%'),
+    ({'user': 'o'}, lambda log: log.user.username == 'bob'),
+    ({'q': 'grade sheet 1'}, lambda log: log.description.endswith('sheet 1')),
+    ({'date_from': START + timedelta(minutes=2), 'date_to': START + timedelta(minutes=4)},
+     lambda log: START + timedelta(minutes=2) <= log.created_at < START + timedelta(minutes=4)),
+])
+def test_filters_page_through_only_their_matches(make, page_size, filters, expected):
+    matches = [log.id for log in add_logs(make, 20) if expected(log)]
+    seen, cursor = [], None
+    while True:
+        page = main.audit_log_search.page(filters, after=cursor)
+        seen += ids(page)
+        cursor = page.older_cursor
+        if not cursor:
+            break
+    assert seen == matches
+    assert (page.total, page.total_exact) == (len(matches), True)
+
+
+def test_count_stops_at_the_limit_and_is_reused(make, monkeypatch):
+    monkeypatch.setattr(main, 'AUDIT_LOG_COUNT_LIMIT', 5)
+    add_logs(make)
+    assert main.audit_log_search.count({}) == (5, False)
+    assert main.audit_log_search.count({'action': 'login_failed'}) == (4, True)
+
+    db.session.add(AuditLog(action='login_failed', description='One more', created_at=START))
+    db.session.commit()
+    # Within AUDIT_LOG_COUNT_TTL the cached count is shown
+    assert main.audit_log_search.count({'action': 'login_failed'}) == (4, True)
+    main.audit_log_search.counts.clear()
+    assert main.audit_log_search.count({'action': 'login_failed'}) == (5, True)
+
+
+def test_audit_log_page_includes_the_whole_to_day(make, client_as):
+    add_logs(make)
+    db.session.add(AuditLog(action='export', description='Late on the last day', created_at=START.replace(hour=23, minute=59)))
+    db.session.add(AuditLog(action='export', description='Next day', created_at=START + timedelta(days=1)))
+    client = client_as(make.user('mis_it'))
+    db.session.commit()
+
+    response = client.get('/misit/audit-logs', query_string={'action': 'export', 'date_to': f'{START:%Y-%m-%d}'})
+    assert response.status_code == 200
+    html = response.get_data(as_text=True)
+    assert 'Late on the last day' in html and 'Next day' not in html
+    # The action dropdown lists every action, not just the filtered one
+    assert '<option value="login_failed"' in html
+
+
+def test_index_command_replaces_the_single_column_indexes(app):
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql('DROP INDEX idx_audit_log_action_created')
+        connection.exec_driver_sql('CREATE INDEX idx_audit_log_action ON audit_log (action)')
+
+    runner = main.app.test_cli_runner()
+    for _ in range(2):
+        result = runner.invoke(args=['add-audit-log-indexes'])
+        assert result.exit_code == 0, result.output
+    indexes = {index['name'] for index in db.inspect(db.engine).get_indexes('audit_log')}
+    assert 'idx_audit_log_action_created' in indexes and 'idx_audit_log_action' not in indexes
@@ -0,0 +1,112 @@
+"""The write-behind audit log pipeline: queue, spill files, replay and bad rows"""
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+import main
+from main import AuditLog, db
+
+
+@pytest.fixture
+def writer(app, monkeypatch, tmp_path):
+    """An async writer with a two record queue and no flusher thread; the test flushes"""
+    monkeypatch.setitem(main.app.config, 'AUDIT_LOG_MODE', 'async')
+    monkeypatch.setitem(main.app.config, 'AUDIT_QUEUE_SIZE', 2)
+    monkeypatch.setitem(main.app.config, 'AUDIT_BATCH_SIZE', 3)
+    monkeypatch.setitem(main.app.config, 'AUDIT_SPILL_DIR', str(tmp_path))
+    writer = main.AuditLogWriter(main.app)
+    writer.thread = object()
+    return writer
+
+
+@pytest.fixture
+def database_down(app):
+    """Fail audit inserts with a connection error from the ``after``-th statement on"""
+    class Outage:
+        after = 0
+        statements = 0
+
+    def fail(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO audit_log'):
+            Outage.statements += 1
+            if Outage.statements > Outage.after:
+                raise OperationalError(statement, parameters, Exception('server has gone away'))
+    event.listen(db.engine, 'before_cursor_execute', fail)
+    yield Outage
+    event.remove(db.engine, 'before_cursor_execute', fail)
+
+
+def record(description, action='login'):
+    return main.AuditRecord(user_id=None, action=action, resource_type=None, resource_id=None,
+                            description=description, ip_address=None, user_agent=None, status='success',
+                            created_at=datetime.utcnow())
+
+
+def descriptions():
+    db.session.expire_all()
+    return sorted(entry.description for entry in AuditLog.query)
+
+
+def spill_lines(tmp_path):
+    return sum(len(path.read_text().splitlines()) for path in tmp_path.iterdir())
+
+
+def test_full_queue_spills_and_the_spill_is_replayed(writer, tmp_path):
+    for n in range(5):
+        writer.write(record(f'entry {n}'))
+
+    assert writer.queue.qsize() == 2
+    assert os.listdir(tmp_path) == [f'spill-{os.getpid()}.jsonl']
+    assert spill_lines(tmp_path) == 3
+
+    writer._flush(writer._drain())
+    writer._replay_spill()
+    assert descriptions() == [f'entry {n}' for n in range(5)]
+    assert os.listdir(tmp_path) == []
+    metrics = writer.get_metrics()
+    assert (metrics['enqueued'], metrics['spilled'], metrics['replayed'], metrics['written']) == (2, 3, 3, 5)
+
+
+def test_rejected_row_is_dropped_and_the_rest_written(writer):
+    writer._flush([record('first'), record('bad', action=None), record('last')])
+
+    assert descriptions() == ['first', 'last']
+    metrics = writer.get_metrics()
+    assert (metrics['written'], metrics['dropped'], metrics['spilled']) == (2, 1, 0)
+
+
+def test_connection_lost_while_retrying_rows_spills_only_the_unwritten(writer, tmp_path, database_down):
+    # The batch fails on its bad row, then the connection goes after the first retried row
+    database_down.after = 2
+    writer._flush([record('first'), record('bad', action=None), record('third')])
+    assert descriptions() == ['first']
+    assert spill_lines(tmp_path) == 2
+
+    database_down.after = float('inf')
+    writer._replay_spill()
+    assert descriptions() == ['first', 'third']
+    assert os.listdir(tmp_path) == []
+    assert writer.get_metrics()['dropped'] == 1
+
+
+def test_replay_keeps_what_the_database_did_not_take(writer, tmp_path, database_down):
+    database_down.after = 0
+    writer._flush([record(f'entry {n}') for n in range(7)])
+    assert spill_lines(tmp_path) == 7
+    assert 'server has gone away' in writer.get_metrics()['last_error']
+
+    # Two batches of three go in, then the database is gone again
+    database_down.statements, database_down.after = 0, 2
+    writer._replay_spill()
+    assert descriptions() == [f'entry {n}' for n in range(6)]
+    assert [path.name for path in tmp_path.iterdir()] == [f'replay-{os.getpid()}-1.jsonl']
+    assert spill_lines(tmp_path) == 1
+
+    database_down.after = float('inf')
+    writer._replay_spill()
+    assert descriptions() == [f'entry {n}' for n in range(7)]
+    assert os.listdir(tmp_path) == []
+    assert writer.get_metrics()['replayed'] == 7
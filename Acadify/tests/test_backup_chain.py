@@ -0,0 +1,145 @@
+"""Change log entries behind delta backups, and the full + delta restore chain"""
+import json
+import time
+
+import pytest
+from sqlalchemy.engine import make_url
+
+import main
+from main import db
+
+mysql_only = pytest.mark.skipif(
+    not main.app.config['SQLALCHEMY_DATABASE_URI'].startswith('mysql'),
+    reason='restores into MySQL; set ACADIFY_TEST_DATABASE_URI to a scratch MySQL database'
+)
+
+
+def logged(operation):
+    return {(entry.table_name, entry.row_id) for entry in main.BackupChangeLog.query.filter_by(operation=operation)}
+
+
+def enroll(student, subject):
+    assignment = main.StudentSubject(student_id=student.id, subject_id=subject.id,
+                                     academic_year=subject.academic_year, semester=subject.semester)
+    db.session.add(assignment)
+    db.session.flush()
+    return assignment
+
+
+def test_deleting_a_student_logs_the_rows_the_database_cascades(make):
+    student, subject = make.student(), make.subject()
+    grade = make.grade(student, subject, 90.0)
+    assignment = enroll(student, subject)
+    enrollment = main.StudentEnrollment(student_id=student.id, academic_year='2024-2025', semester=1, year_level=1)
+    db.session.add(enrollment)
+    db.session.commit()
+    main.BackupChangeLog.query.delete()
+    db.session.commit()
+
+    db.session.delete(student)
+    db.session.commit()
+
+    assert {('students', student.id), ('grade', grade.id), ('student_subjects', assignment.id),
+            ('student_enrollments', enrollment.id)} <= logged('delete')
+
+
+def test_bulk_delete_logs_the_rows_the_database_cascades(make):
+    student, subject = make.student(), make.subject()
+    grade = make.grade(student, subject, 90.0)
+    assignment = enroll(student, subject)
+    ids = dict(student=student.id, subject=subject.id, grade=grade.id, assignment=assignment.id)
+    db.session.commit()
+    main.BackupChangeLog.query.delete()
+    db.session.commit()
+
+    main.Subject.query.filter_by(id=ids['subject']).delete(synchronize_session=False)
+    db.session.commit()
+
+    assert logged('delete') == {('subject', ids['subject']), ('grade', ids['grade']),
+                                ('student_subjects', ids['assignment'])}
+
+
+def test_set_null_children_are_logged_as_updates(make):
+    instructor = make.user('instructor')
+    grade = make.grade(make.student(), make.subject(), 90.0, approved_by=instructor.id)
+    ids = dict(instructor=instructor.id, grade=grade.id)
+    db.session.commit()
+    main.BackupChangeLog.query.delete()
+    db.session.commit()
+
+    main.User.query.filter_by(id=ids['instructor']).delete(synchronize_session=False)
+    db.session.commit()
+
+    # approved_by is SET NULL: the grade stays, but its new value has to reach the delta
+    assert ('grade', ids['grade']) in logged('update')
+    assert ('grade', ids['grade']) not in logged('delete')
+
+
+def write_manifest(directory, backup_id, snapshot_at, parent_id=None, **fields):
+    manifest = dict(format=main.BACKUP_FORMAT, backup_id=backup_id, snapshot_at=snapshot_at,
+                    kind='delta' if parent_id else 'full', parent_id=parent_id, tables={}, **fields)
+    path = directory / f'acadify_backup_{backup_id}.sql.gz.manifest.json'
+    path.write_text(json.dumps(manifest))
+
+
+def chain_ids(directory, until=None):
+    return [manifest['backup_id'] for manifest in main.backup_chain(str(directory), until)]
+
+
+def test_backup_chain_replays_the_newest_full_backup_and_its_deltas(tmp_path):
+    write_manifest(tmp_path, 'full1', '2025-01-01T00:00:00')
+    write_manifest(tmp_path, 'delta1', '2025-01-02T00:00:00', 'full1')
+    write_manifest(tmp_path, 'full2', '2025-01-03T00:00:00')
+    write_manifest(tmp_path, 'delta2', '2025-01-04T00:00:00', 'full2')
+    write_manifest(tmp_path, 'delta3', '2025-01-05T00:00:00', 'delta2')
+    write_manifest(tmp_path, 'partial', '2025-01-06T00:00:00', partial=True)
+
+    assert chain_ids(tmp_path) == ['full2', 'delta2', 'delta3']
+    assert chain_ids(tmp_path, until='delta1') == ['full1', 'delta1']
+    assert chain_ids(tmp_path, until='full2') == ['full2']
+    assert main.backup_chain(str(tmp_path))[0]['path'] == str(tmp_path / 'acadify_backup_full2.sql.gz')
+
+
+def test_backup_chain_refuses_a_delta_without_its_parent(tmp_path):
+    write_manifest(tmp_path, 'delta1', '2025-01-02T00:00:00', 'full1')
+
+    with pytest.raises(ValueError, match='full1'):
+        main.backup_chain(str(tmp_path))
+    with pytest.raises(ValueError, match='No backup missing'):
+        main.backup_chain(str(tmp_path), until='missing')
+    with pytest.raises(ValueError, match='No backups'):
+        main.backup_chain(str(tmp_path / 'empty'))
+
+
+@mysql_only
+def test_restored_chain_drops_rows_removed_by_cascade(make, tmp_path):
+    deleted, kept, subject = make.student(), make.student(), make.subject()
+    for student in (deleted, kept):
+        make.grade(student, subject, 90.0)
+        enroll(student, subject)
+    db.session.commit()
+    runner = main.app.test_cli_runner()
+
+    result = runner.invoke(args=['backup-database', '--output-dir', str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    db.session.delete(deleted)
+    db.session.commit()
+    time.sleep(1.1)  # backup ids have a one second resolution
+    result = runner.invoke(args=['backup-database', '--output-dir', str(tmp_path), '--incremental'])
+    assert result.exit_code == 0, result.output
+    assert [manifest['kind'] for manifest in main.backup_chain(str(tmp_path))] == ['full', 'delta']
+
+    target = make_url(main.app.config['SQLALCHEMY_DATABASE_URI']).database + '_restore_test'
+    result = runner.invoke(args=['restore-backup', str(tmp_path), '--database', target])
+    connection = main._backup_restore_connection(target)
+    try:
+        assert result.exit_code == 0, result.output
+        cursor = connection.cursor()
+        for table_name in ('grade', 'student_subjects'):
+            cursor.execute(f"SELECT student_id FROM `{table_name}`")
+            assert {row[0] for row in cursor.fetchall()} == {kept.id}
+        cursor.execute("SELECT id FROM students")
+        assert {row[0] for row in cursor.fetchall()} == {kept.id}
+    finally:
+        connection.cursor().execute(f"DROP DATABASE `{target}`")
+        connection.close()
@@ -0,0 +1,100 @@
+"""Server-Sent Events stream of the change feed"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+from main import db
+
+
+@pytest.fixture
+def broadcaster(app, monkeypatch, tmp_path):
+    """Streams on, through a broadcaster of this test's own that ticks quickly"""
+    monkeypatch.setitem(main.app.config, 'SSE_ENABLED', True)
+    monkeypatch.setitem(main.app.config, 'SSE_SOCKET_DIR', str(tmp_path))
+    broadcaster = main.ChangeBroadcaster(main.app)
+    broadcaster.TICK_SECONDS = 0.2
+    monkeypatch.setattr(main, 'change_broadcaster', broadcaster)
+    return broadcaster
+
+
+@pytest.fixture
+def client(make, client_as):
+    client = client_as(make.user('instructor'))
+    db.session.commit()
+    return client
+
+
+def changes(*resources, settled=False):
+    """Commit a feed event per resource; settled ones are old enough for new streams to start after"""
+    for resource in resources:
+        main.record_change(resource)
+    if settled:
+        for event in db.session.new:
+            event.created_at = datetime.utcnow() - timedelta(seconds=main.CHANGE_FEED_SETTLE_SECONDS + 5)
+    db.session.commit()
+    main._change_feed_start['checked_at'] = 0.0
+
+
+def read_events(response, count):
+    """The next ``count`` change events of an open stream, as (id, resource)"""
+    events = []
+    for chunk in response.response:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith('id: '):
+            data = json.loads(chunk.split('data: ', 1)[1])
+            assert chunk.startswith(f"id: {data['id']}\nevent: change\n")
+            events.append((data['id'], data['resource']))
+            if len(events) == count:
+                break
+        else:
+            assert chunk.startswith(('retry:', ': keep-alive')), chunk
+    return events
+
+
+def test_stream_is_refused_when_disabled_or_unscoped(app, make, client_as, broadcaster, monkeypatch):
+    client = client_as(make.user('instructor'))
+    db.session.commit()
+    assert client.get('/api/stream').status_code == 400
+
+    monkeypatch.setitem(main.app.config, 'SSE_ENABLED', False)
+    # Pages fall back to polling on this answer
+    assert client.get('/api/stream', query_string={'resources': 'enrollments'}).status_code == 503
+    assert broadcaster.subscribers == []
+
+
+def test_reconnect_replays_missed_events_of_its_resources(client, broadcaster):
+    changes('enrollments', 'schedules', 'enrollments', 'grades:1', settled=True)
+
+    response = client.get('/api/stream', query_string={'resources': 'enrollments,grades:1'},
+                          headers={'Last-Event-ID': '1'}, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    assert read_events(response, 2) == [(3, 'enrollments'), (4, 'grades:1')]
+    response.close()
+    assert broadcaster.subscribers == []
+    assert broadcaster.cursor is None
+
+
+def test_far_behind_stream_ends_after_one_backlog_page(client, broadcaster, monkeypatch):
+    monkeypatch.setattr(main, 'STREAM_BACKLOG_LIMIT', 2)
+    changes('enrollments', 'enrollments', 'enrollments', settled=True)
+
+    response = client.get('/api/stream', query_string={'resources': 'enrollments', 'cursor': 0}, buffered=False)
+    # The browser reconnects from the last id for the rest
+    assert read_events(response, 3) == [(1, 'enrollments'), (2, 'enrollments')]
+    assert broadcaster.subscribers == []
+
+
+def test_committed_change_reaches_an_open_stream(client, broadcaster):
+    changes('enrollments', settled=True)
+
+    response = client.get('/api/stream', query_string={'resources': 'enrollments'}, buffered=False)
+    assert broadcaster.cursor == 1
+    changes('schedules', 'enrollments')
+    try:
+        # Only the stream's own resources, and nothing from before it opened
+        assert read_events(response, 1) == [(3, 'enrollments')]
+    finally:
+        response.close()
+    assert broadcaster.cursor is None
@@ -0,0 +1,185 @@
+"""Streamed database backup: worker count, audit trail, dump format and verification"""
+import gzip
+from datetime import datetime
+
+import pymysql.converters
+import pytest
+
+import main
+
+
+class FakeBackup:
+    """Records the workers it was given instead of dumping MySQL"""
+    created = []
+
+    def __init__(self, workers=1):
+        self.workers = workers
+        self.backup_id = 'test'
+        self.manifest = {'tables': {}}
+        FakeBackup.created.append(self)
+
+    def stream(self):
+        yield b'first chunk'
+        yield b'second chunk'
+
+
+@pytest.fixture
+def backup_client(make, client_as, monkeypatch):
+    monkeypatch.setitem(main.app.config, 'SQLALCHEMY_DATABASE_URI', 'mysql+pymysql://backup-test')
+    monkeypatch.setitem(main.app.config, 'BACKUP_WORKERS', 4)
+    monkeypatch.setattr(main, 'DatabaseBackup', FakeBackup)
+    FakeBackup.created.clear()
+    client = client_as(make.user(role='mis_it'))
+    main.db.session.commit()
+    return client
+
+
+@pytest.mark.parametrize('query, workers', [('', 4), ('?workers=2', 2), ('?workers=64', 4), ('?workers=0', 1), ('?workers=-3', 1)])
+def test_requested_workers_are_capped_by_config(backup_client, query, workers):
+    response = backup_client.post(f'/api/database-backup{query}')
+    assert response.status_code == 200
+    response.get_data()
+    assert [backup.workers for backup in FakeBackup.created] == [workers]
+
+
+def backup_audit_entries():
+    return [(entry.status, entry.description) for entry in main.AuditLog.query.filter_by(action='create_database_backup')]
+
+
+def test_finished_download_is_audit_logged(backup_client):
+    response = backup_client.post('/api/database-backup')
+    assert response.get_data() == b'first chunksecond chunk'
+    assert backup_audit_entries() == [('success', 'Database backup created (0 tables, 0 rows)')]
+
+
+def test_aborted_download_is_audit_logged(backup_client):
+    response = backup_client.post('/api/database-backup')
+    assert next(iter(response.response)) == b'first chunk'
+    response.close()
+
+    [(status, description)] = backup_audit_entries()
+    assert status == 'failed'
+    assert 'aborted' in description
+
+
+class FakeMySQL:
+    """Answers the statements DatabaseBackup sends to MySQL from in-memory tables"""
+
+    def __init__(self, tables):
+        self.tables = tables  # {name: (columns, rows)}
+
+    def cursor(self):
+        return FakeCursor(self.tables)
+
+    def escape(self, value):
+        return pymysql.converters.escape_item(value, 'utf8mb4')
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, tables):
+        self.tables = tables
+        self.rows = []
+        self.description = None
+
+    def execute(self, statement, params=()):
+        self.rows = []
+        if statement.startswith('SHOW FULL TABLES'):
+            self.rows = [(name, 'BASE TABLE') for name in self.tables]
+        elif statement.startswith('SELECT COLUMN_NAME'):
+            self.rows = [('id',)]
+        elif statement.startswith('SHOW CREATE TABLE'):
+            name = statement.split('`')[1]
+            columns = ', '.join(f'`{column}` text' for column in self.tables[name][0])
+            self.rows = [(name, f'CREATE TABLE `{name}` ({columns}, PRIMARY KEY (`id`))')]
+        elif statement.startswith('SELECT * FROM'):
+            columns, rows = self.tables[statement.split('`')[1]]
+            self.description = [(column,) for column in columns]
+            self.rows = list(rows)
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+# Values that could end a statement early if the dump were split naively, then enough
+# rows for several INSERTs and fetches
+NOTES = [
+    (1, "it's; done", None),
+    (2, 'line\nbreak ;', datetime(2025, 1, 1, 8, 30)),
+    (3, 'ends with );', None),
+    (4, 'ünïcode ✓ `quoted`', None),
+] + [(n, f'note {n}', datetime(2025, 1, 2)) for n in range(5, 1204)]
+LABELS = [(1, 'only row', None)]
+
+
+@pytest.fixture
+def backup_file(app, monkeypatch, tmp_path, request):
+    """Path of a dump written from the fake server with request.param workers"""
+    tables = {'notes': (['id', 'body', 'created_at'], NOTES), 'labels': (['id', 'name', 'created_at'], LABELS)}
+    monkeypatch.setattr(main.DatabaseBackup, '_connect', lambda self: FakeMySQL(tables))
+    path = str(tmp_path / 'acadify_backup_test.sql.gz')
+    main.DatabaseBackup(workers=getattr(request, 'param', 1), database='acadify_test').write_to(path)
+    return path
+
+
+def read_statements(path):
+    with gzip.open(path, 'rb') as dump:
+        return list(main.iter_backup_statements(dump))
+
+
+def rewrite(path, change):
+    with gzip.open(path, 'rt', encoding='utf-8') as dump:
+        text = dump.read()
+    with gzip.open(path, 'wt', encoding='utf-8') as dump:
+        dump.write(change(text))
+
+
+@pytest.mark.parametrize('backup_file', [1, 2], indirect=True)
+def test_dump_round_trips_through_iter_backup_statements(backup_file):
+    statements = read_statements(backup_file)
+    escape = FakeMySQL({}).escape
+
+    notes = [(statement, rows) for statement, table_name, rows in statements if table_name == 'notes']
+    assert [row for statement, rows in notes for row in rows] == [
+        '(' + ','.join(escape(value) for value in row) + ')' for row in NOTES
+    ]
+    assert [len(rows) for statement, rows in notes] == [500, 500, 203]
+    assert all(statement.startswith('INSERT INTO `notes`') for statement, rows in notes)
+    assert [rows for statement, table_name, rows in statements if table_name == 'labels'] == [["(1,'only row',NULL)"]]
+    assert statements[0][0] == 'SET NAMES utf8mb4;\n'
+    assert statements[-1][0] == 'SET FOREIGN_KEY_CHECKS=1;\n'
+    assert main.verify_backup(backup_file) == []
+
+
+def test_verify_reports_changed_rows(backup_file):
+    rewrite(backup_file, lambda text: text.replace("'note 7'", "'note 8'"))
+
+    [problem] = main.verify_backup(backup_file)
+    assert problem.startswith('notes: file has 1203 rows')
+
+
+def test_verify_reports_tables_missing_from_the_manifest(backup_file):
+    rewrite(backup_file, lambda text: text.replace(
+        'SET FOREIGN_KEY_CHECKS=1;', "INSERT INTO `ghost` (`id`) VALUES\n(1);\nSET FOREIGN_KEY_CHECKS=1;"
+    ))
+
+    assert main.verify_backup(backup_file) == ['ghost: not listed in the manifest']
+
+
+def test_verify_reports_a_truncated_dump(backup_file):
+    rewrite(backup_file, lambda text: text[:text.index('SET FOREIGN_KEY_CHECKS=1;')])
+    assert main.verify_backup(backup_file) == ['Manifest missing: the backup is incomplete']
+
+    rewrite(backup_file, lambda text: text[:text.index("(600,'note 600'")])
+    with pytest.raises(ValueError, match='middle of a statement'):
+        main.verify_backup(backup_file)
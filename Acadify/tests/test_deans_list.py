@@ -0,0 +1,215 @@
+"""evaluate_deans_list against the per-student check it replaced, on generated cohorts"""
+import random
+
+import pytest
+
+import main
+from main import Grade, Student, Subject, db
+
+
+def legacy_check_deans_list_eligibility(student_id, semester, academic_year):
+    """check_deans_list_eligibility as it was before the cohort evaluator (one student, N+1 queries)"""
+    student = db.session.get(Student, student_id)
+    if not student:
+        return False, 0, 0, "Student not found"
+
+    if not student.section_type or student.section_type.lower() != 'block section':
+        return False, 0, 0, "Not a regular student (Block Section required)"
+
+    # The old query had no ORDER BY, so with several failing grades the reported one
+    # depended on the query plan; the evaluator reads grades in id order, as here
+    grades = Grade.query.filter_by(student_id=student_id, semester=semester, academic_year=academic_year).order_by(Grade.id).all()
+    if not grades:
+        return False, 0, 0, "No grades found"
+
+    complete_grades = [g for g in grades if g.prelim_grade is not None and g.midterm_grade is not None and g.final_grade is not None]
+    if not complete_grades:
+        return False, 0, 0, "Incomplete grades"
+
+    total_all_units = 0
+    for grade in complete_grades:
+        subject = db.session.get(Subject, grade.subject_id)
+        if subject:
+            total_all_units += subject.units
+    if total_all_units < 18:
+        return False, 0, total_all_units, f"Insufficient units ({total_all_units}/18 required)"
+
+    academic_units = 0
+    total_points = 0
+    for grade in complete_grades:
+        subject = db.session.get(Subject, grade.subject_id)
+        if not subject:
+            continue
+        if subject.subject_type != 'Academic':
+            continue
+        if not grade.equivalent_grade or grade.equivalent_grade >= 5.00:
+            return False, 0, 0, "Has failing grades"
+        if grade.equivalent_grade > 2.00:
+            return False, 0, 0, "Has grades below 2.00"
+        if grade.remarks and grade.remarks in ['INC', 'AW', 'UW']:
+            return False, 0, 0, f"Has {grade.remarks} mark"
+        academic_units += subject.units
+        total_points += grade.equivalent_grade * subject.units
+
+    gwa = total_points / academic_units if academic_units > 0 else 0
+    if gwa > 1.75:
+        return False, gwa, total_all_units, f"GWA too high ({gwa:.2f} > 1.75)"
+    return True, gwa, total_all_units, "Eligible for Dean's List"
+
+
+def legacy_dashboard_ranking(semester, academic_year):
+    """Eligible students with ranks, built the way registrar_dashboard used to"""
+    ranked = []
+    for student in Student.query.filter_by(semester=semester, academic_year=academic_year).order_by(Student.id):
+        is_eligible, gwa, total_units, reason = legacy_check_deans_list_eligibility(student.id, semester, academic_year)
+        if is_eligible:
+            ranked.append({'student': student, 'gwa': gwa, 'total_units': total_units, 'reason': reason})
+    ranked.sort(key=lambda x: x['gwa'])
+    for i, entry in enumerate(ranked):
+        entry['rank'] = ranked[i - 1]['rank'] if i > 0 and entry['gwa'] == ranked[i - 1]['gwa'] else i + 1
+    return ranked
+
+
+def seed_cohort(make, seed, size):
+    """A term with every rule exercised: section types, unit loads, subject types, marks, gaps and strays"""
+    rnd = random.Random(seed)
+    subjects = [
+        make.subject(units=rnd.choice([1, 2, 3, 3, 3, 5]), subject_type='Academic' if n % 4 else 'Non Academic')
+        for n in range(9)
+    ]
+    other_term = make.subject(academic_year='2023-2024', semester=2)
+    for _ in range(size):
+        student = make.student(section_type=rnd.choice(['Block Section', 'Block Section', 'block section', 'Irregular', None]))
+        strong = rnd.random() < 0.5
+        for subject in rnd.sample(subjects, rnd.randint(0, len(subjects))):
+            average = rnd.uniform(86, 100) if strong else rnd.uniform(70, 100)
+            grade = make.grade(student, subject, round(average, 2))
+            roll = rnd.random()
+            if roll < 0.05:
+                grade.final_grade = None
+                grade.is_complete = False
+            elif roll < 0.08:
+                grade.remarks = rnd.choice(['INC', 'AW', 'UW'])
+            elif roll < 0.10:
+                grade.equivalent_grade = None
+        if rnd.random() < 0.1:
+            make.grade(student, other_term, 99.0)
+    # Every grade at 2.00 passes the per-grade rules but not the GWA cut-off
+    near_miss = make.student()
+    for subject in [make.subject() for _ in range(6)]:
+        make.grade(near_miss, subject, 87.0)
+    # A grade whose subject was deleted is skipped by both implementations
+    orphan = make.student()
+    make.grade(orphan, subjects[0], 99.0).subject_id = 999999
+    db.session.commit()
+
+
+@pytest.mark.parametrize('seed, size', [(1, 120), (2, 150), (3, 300)])
+def test_cohort_results_match_legacy_check(app, make, seed, size):
+    seed_cohort(make, seed, size)
+
+    evaluation = main.evaluate_deans_list(1, '2024-2025')
+    students = Student.query.filter_by(semester=1, academic_year='2024-2025').all()
+    assert set(evaluation['results']) == {student.id for student in students}
+
+    reasons = set()
+    for student in students:
+        expected = legacy_check_deans_list_eligibility(student.id, 1, '2024-2025')
+        is_eligible, gwa, total_units, reason = evaluation['results'][student.id]
+        assert (is_eligible, total_units, reason) == (expected[0], expected[2], expected[3]), student.id
+        assert gwa == pytest.approx(expected[1])
+        assert main.check_deans_list_eligibility(student.id, 1, '2024-2025') == evaluation['results'][student.id]
+        reasons.add(reason.split(' (')[0])
+    # The generated cohort reaches every branch of the rules
+    assert {'Eligible for Dean\'s List', 'Not a regular student', 'No grades found', 'Insufficient units',
+            'Has grades below 2.00', 'GWA too high'} <= reasons
+
+
+@pytest.mark.parametrize('seed', [4, 5])
+def test_ranking_matches_legacy_dashboard(app, make, seed):
+    seed_cohort(make, seed, 200)
+
+    expected = legacy_dashboard_ranking(1, '2024-2025')
+    ranked = main.evaluate_deans_list(1, '2024-2025')['ranked']
+    assert expected, 'cohort has no eligible students'
+    assert [(entry['student'].id, entry['rank']) for entry in ranked] == [(entry['student'].id, entry['rank']) for entry in expected]
+    assert [entry['gwa'] for entry in ranked] == pytest.approx([entry['gwa'] for entry in expected])
+
+
+def test_department_and_explicit_students(app, make):
+    seed_cohort(make, 6, 40)
+    other = make.student(department='BSIT')
+    db.session.commit()
+
+    by_department = main.evaluate_deans_list(1, '2024-2025', department='BSCS')['results']
+    assert other.id not in by_department
+    assert main.evaluate_deans_list(1, '2024-2025', student_ids=[])['results'] == {}
+    assert main.check_deans_list_eligibility(987654, 1, '2024-2025') == (False, 0, 0, "Student not found")
+
+
+def stored_records(semester=1, academic_year='2024-2025'):
+    db.session.expire_all()
+    return {record.student_id: (bool(record.qualified), record.rank)
+            for record in main.DeansListRecord.query.filter_by(semester=semester, academic_year=academic_year)}
+
+
+def expected_records(semester=1, academic_year='2024-2025'):
+    evaluation = main.evaluate_deans_list(semester, academic_year, student_ids=main._deans_list_cohort_ids(semester, academic_year))
+    ranks = {entry['student'].id: entry['rank'] for entry in evaluation['ranked']}
+    return {student_id: (result[0], ranks.get(student_id)) for student_id, result in evaluation['results'].items()}
+
+
+def test_existing_grades_are_backfilled_once_when_the_table_is_empty(app, make):
+    seed_cohort(make, 7, 60)
+    assert main.DeansListRecord.query.count() == 0
+
+    assert main.backfill_deans_list_records() is True
+    assert stored_records() == expected_records()
+    assert stored_records(2, '2023-2024') == expected_records(2, '2023-2024')
+    assert any(qualified for qualified, rank in stored_records().values())
+
+    # Once filled, grade writes keep the rows current and startup leaves them alone
+    assert main.backfill_deans_list_records() is False
+
+
+def test_backfill_skips_a_database_without_grades(app):
+    assert main.backfill_deans_list_records() is False
+    assert main.DeansListRecord.query.count() == 0
+
+
+def test_saved_grade_moves_the_student_onto_the_list(app, make, client_as):
+    student = make.student()
+    subjects = [make.subject() for _ in range(6)]
+    for subject in subjects[:5]:
+        make.grade(student, subject, 95.0)
+    rival = make.student()
+    for subject in subjects:
+        make.grade(rival, subject, 97.0)
+    db.session.commit()
+    main.rebuild_deans_list_records()
+    # Five subjects are 15 units, below the 18 the list requires
+    assert stored_records()[student.id] == (False, None)
+    assert stored_records()[rival.id] == (True, 1)
+
+    response = client_as(make.user()).post('/api/save-historical-grade', json=dict(
+        student_id=student.id, subject_id=subjects[5].id, semester=1, academic_year='2024-2025',
+        prelim_grade=99.0, midterm_grade=99.0, final_grade=99.0
+    ))
+    assert response.get_json()['status'] == 'success'
+    assert stored_records()[student.id][0] is True
+    # The rival is re-ranked against the newcomer
+    assert stored_records() == expected_records()
+    assert sorted(rank for qualified, rank in stored_records().values()) == [1, 2]
+
+
+def test_rebuild_drops_records_of_students_without_grades(app, make):
+    student, subject = make.student(), make.subject()
+    grade = make.grade(student, subject, 95.0)
+    db.session.commit()
+    main.rebuild_deans_list_records()
+    assert student.id in stored_records()
+
+    db.session.delete(grade)
+    db.session.commit()
+    main.rebuild_deans_list_records()
+    assert stored_records() == {}
@@ -0,0 +1,242 @@
+"""EncodingTransitionScheduler driven by hand with a fake clock"""
+import fcntl
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+
+import pytest
+
+import main
+from main import ChangeFeedEvent, EncodingException, GradeEncodingSchedule, db
+
+DAY = datetime(2025, 8, 4)
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeLockConnection:
+    """Stands in for the MySQL connection holding the advisory lock"""
+
+    def __init__(self, held):
+        self.held = held
+        self.closed = False
+
+    def execute(self, statement, params):
+        return self
+
+    def scalar(self):
+        return self.held
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(DAY.replace(hour=8))
+
+
+@pytest.fixture
+def scheduler(app, clock, tmp_path, monkeypatch):
+    # Keep the lock file away from any dev server's
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    scheduler = main.EncodingTransitionScheduler(app, clock=clock)
+    yield scheduler
+    scheduler._release_lock()
+    if scheduler.lock_file is not None:
+        scheduler.lock_file.close()
+
+
+def add_schedule(make, **fields):
+    fields = dict(dict(academic_year='2025-2026', semester=1, start_date=DAY, end_date=DAY, status='upcoming',
+                       created_by=make.user(role='mis_it').id), **fields)
+    schedule = GradeEncodingSchedule(**fields)
+    db.session.add(schedule)
+    db.session.commit()
+    return schedule
+
+
+def status_of(schedule):
+    db.session.expire_all()
+    return db.session.get(GradeEncodingSchedule, schedule.id).status
+
+
+def feed_actions(resource):
+    return [event.action for event in ChangeFeedEvent.query.filter_by(resource=resource).order_by(ChangeFeedEvent.id)]
+
+
+def test_timed_window_opens_and_closes(make, clock, scheduler):
+    schedule = add_schedule(make, start_time=time(9, 0), end_time=time(10, 0))
+
+    # Nothing due before the window; the wait is capped by the next rescan
+    assert scheduler.step() == scheduler.RESCAN_SECONDS
+    assert status_of(schedule) == 'upcoming'
+
+    clock.now = DAY.replace(hour=8, minute=59, second=59)
+    assert scheduler.step() == 1
+    assert status_of(schedule) == 'upcoming'
+
+    clock.now = DAY.replace(hour=9)
+    scheduler.step()
+    assert status_of(schedule) == 'active'
+
+    # Still open at end_time itself, closed just after it
+    clock.now = DAY.replace(hour=10)
+    scheduler.step()
+    assert status_of(schedule) == 'active'
+    clock.now = DAY.replace(hour=10) + timedelta(microseconds=1)
+    scheduler.step()
+    assert status_of(schedule) == 'completed'
+    assert feed_actions('schedules') == ['active', 'completed']
+
+    # A completed schedule leaves no timer behind
+    clock.now += timedelta(days=2)
+    scheduler.step()
+    assert scheduler.timers == []
+
+
+def test_date_window_opens_and_closes(make, clock, scheduler):
+    schedule = add_schedule(make, start_date=DAY + timedelta(days=1), end_date=DAY + timedelta(days=2))
+
+    scheduler.step()
+    assert status_of(schedule) == 'upcoming'
+
+    clock.now = DAY + timedelta(days=1)
+    scheduler.step()
+    assert status_of(schedule) == 'active'
+
+    clock.now = DAY + timedelta(days=2, hours=23, minutes=59)
+    scheduler.step()
+    assert status_of(schedule) == 'active'
+
+    clock.now = DAY + timedelta(days=3)
+    scheduler.step()
+    assert status_of(schedule) == 'completed'
+
+
+def test_overdue_status_is_fixed_on_first_step(make, clock, scheduler):
+    schedule = add_schedule(make, start_date=DAY - timedelta(days=3), end_date=DAY - timedelta(days=1), status='active')
+
+    scheduler.step()
+    assert status_of(schedule) == 'completed'
+
+
+def test_exception_expires_after_its_date_unless_extended(make, clock, scheduler):
+    expires = DAY.replace(hour=12)
+    instructor, registrar = make.user(role='instructor'), make.user()
+    exceptions = [
+        EncodingException(instructor_id=instructor.id, academic_year='2025-2026', semester=1, grading_period='all',
+                          expiration_date=expires, granted_by=registrar.id)
+        for _ in range(2)
+    ]
+    db.session.add_all(exceptions)
+    db.session.commit()
+    kept, extended = [exception.id for exception in exceptions]
+
+    scheduler.step()
+    # Extended behind the scheduler's back (another worker): its timer is stale
+    db.session.get(EncodingException, extended).expiration_date = expires + timedelta(hours=1)
+    db.session.commit()
+    scheduler.stale = False
+
+    clock.now = expires
+    scheduler.step()
+    assert db.session.get(EncodingException, kept).is_active
+
+    clock.now = expires + timedelta(microseconds=1)
+    scheduler.step()
+    db.session.expire_all()
+    assert not db.session.get(EncodingException, kept).is_active
+    assert db.session.get(EncodingException, kept).revoked_at == clock.now
+    assert db.session.get(EncodingException, extended).is_active
+
+    clock.now = expires + timedelta(hours=1, seconds=1)
+    scheduler.step()
+    db.session.expire_all()
+    assert not db.session.get(EncodingException, extended).is_active
+    assert feed_actions('exceptions') == ['expired', 'expired']
+
+
+def run_once(scheduler):
+    """One pass of the scheduler thread's loop"""
+    if scheduler._hold_lock():
+        return scheduler.step()
+    return None
+
+
+def test_lock_holder_keeps_applying(make, clock, scheduler):
+    schedule = add_schedule(make, start_time=time(9, 0), end_time=time(10, 0))
+    connection = FakeLockConnection(held=1)
+    scheduler.lock_connection = connection
+
+    assert run_once(scheduler) is not None
+    clock.now = DAY.replace(hour=9, minute=30)
+    run_once(scheduler)
+    assert status_of(schedule) == 'active'
+    assert scheduler.lock_connection is connection
+    assert not connection.closed
+
+
+def test_lost_lock_stops_applying_until_retaken(make, clock, scheduler):
+    schedule = add_schedule(make, start_time=time(9, 0), end_time=time(10, 0))
+    scheduler.lock_connection = FakeLockConnection(held=1)
+    run_once(scheduler)
+
+    # The advisory lock went away with its connection, and another worker took over
+    lost = FakeLockConnection(held=0)
+    scheduler.lock_connection = lost
+    other_worker = open(os.path.join(str(tempfile.tempdir), f'{scheduler.LOCK_NAME}.lock'), 'w')
+    fcntl.flock(other_worker, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    clock.now = DAY.replace(hour=8, second=20)
+    assert run_once(scheduler) is None
+    assert lost.closed
+    assert scheduler.lock_connection is None
+
+    # Meanwhile the other worker moved the window forward, which this process never heard of
+    db.session.get(GradeEncodingSchedule, schedule.id).start_time = time(8, 0)
+    db.session.commit()
+    scheduler.stale = False
+
+    # Once the other worker is gone this one takes over and rebuilds its timers first
+    other_worker.close()
+    clock.now = DAY.replace(hour=8, second=30)
+    assert run_once(scheduler) is not None
+    assert status_of(schedule) == 'active'
+
+
+def test_edit_committed_by_another_worker_is_seen_in_the_change_feed(make, clock, scheduler):
+    schedule = add_schedule(make, start_time=time(9, 0), end_time=time(10, 0))
+    assert scheduler.step() == scheduler.RESCAN_SECONDS
+
+    # Another worker moves the window forward: its commit only wakes its own scheduler,
+    # and this process's cached feed head expires
+    db.session.get(GradeEncodingSchedule, schedule.id).start_time = time(8, 0)
+    main.record_change('schedules', schedule.id)
+    db.session.commit()
+    scheduler.stale = False
+    main._change_feed_head['checked_at'] = 0.0
+
+    clock.now = DAY.replace(hour=8, second=5)
+    scheduler.step()
+    assert status_of(schedule) == 'active'
+
+
+def test_idle_feed_check_does_not_rebuild(make, clock, scheduler, monkeypatch):
+    add_schedule(make, start_time=time(9, 0), end_time=time(10, 0))
+    scheduler.step()
+    rebuilds = []
+    monkeypatch.setattr(scheduler, '_rebuild', rebuilds.append)
+
+    clock.now = DAY.replace(hour=8, second=5)
+    scheduler.step()
+    assert rebuilds == []
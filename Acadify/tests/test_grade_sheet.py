@@ -0,0 +1,49 @@
+"""Keyset paging of the registrar grade sheet"""
+import pytest
+
+import main
+from main import db
+
+
+def page_through(sort, filters=None):
+    """Every page of the grade sheet in one sort order, as (grade ids per page)"""
+    pages = []
+    after = None
+    while True:
+        page = main.grade_sheet_query.page(filters or {'academic_year': '2024-2025'}, sort=sort, after=after)
+        pages.append([row.id for row in page.items])
+        if page.next_cursor is None:
+            return pages
+        after = page.next_cursor
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(main, 'GRADE_SHEET_PAGE_SIZE', 4)
+
+
+def test_average_sort_pages_across_a_tie_group(make, small_pages):
+    subject = make.subject()
+    # 87.33 as MySQL FLOAT hands it back and as entered: one tie group spanning three pages
+    averages = [87.33000183105469, 87.33] * 5 + [90.0, 80.5, None, 87.34, 87.32]
+    grades = [make.grade(make.student(), subject, average) for average in averages]
+    db.session.commit()
+
+    pages = page_through('average')
+    seen = [grade_id for page in pages for grade_id in page]
+    assert all(len(page) == 4 for page in pages[:-1])
+    assert sorted(seen) == sorted(grade.id for grade in grades)
+
+    def expected_key(grade):
+        return (round(grade.final_average, 2) if grade.final_average is not None else -1.0, grade.id)
+    assert seen == [grade.id for grade in sorted(grades, key=expected_key, reverse=True)]
+
+
+@pytest.mark.parametrize('sort', ['student', 'student_id', 'subject'])
+def test_other_sorts_visit_every_row_once(make, small_pages, sort):
+    subjects = [make.subject(), make.subject()]
+    grades = [make.grade(make.student(last_name='Santos'), subjects[n % 2], 85.0) for n in range(11)]
+    db.session.commit()
+
+    seen = [grade_id for page in page_through(sort) for grade_id in page]
+    assert sorted(seen) == sorted(grade.id for grade in grades)
@@ -0,0 +1,99 @@
+"""Grade upserts on databases with and without the unique grade key"""
+import pytest
+
+import main
+from main import Grade, db
+
+KEY = 'unique_grade_student_subject_term'
+
+
+def recreate_grade_table_without_key():
+    """The grade table as databases created before the unique key have it"""
+    metadata = db.MetaData()
+    for table in db.metadata.sorted_tables:
+        table.to_metadata(metadata)
+    legacy = metadata.tables['grade']
+    legacy.constraints = {constraint for constraint in legacy.constraints if constraint.name != KEY}
+    db.session.remove()
+    Grade.__table__.drop(db.engine)
+    legacy.create(db.engine)
+    main._grade_upsert_key['present'] = False
+
+
+def grade_row(student, subject, average):
+    equivalent, remarks = main.calculate_grade_equivalent(average)
+    return dict(student_id=student.id, subject_id=subject.id, semester=subject.semester,
+                academic_year=subject.academic_year, prelim_grade=average, midterm_grade=average,
+                final_grade=average, final_average=average, equivalent_grade=equivalent,
+                remarks=remarks, is_complete=True)
+
+
+def test_upsert_updates_in_place(make):
+    student, subject = make.student(), make.subject()
+    db.session.commit()
+
+    main.upsert_grades([grade_row(student, subject, 80.0)])
+    main.upsert_grades([grade_row(student, subject, 91.0)])
+    db.session.commit()
+    assert [grade.final_average for grade in Grade.query.all()] == [91.0]
+
+
+def test_upsert_is_refused_without_the_key(make):
+    row = grade_row(make.student(), make.subject(), 80.0)
+    db.session.commit()
+    recreate_grade_table_without_key()
+
+    with pytest.raises(RuntimeError, match='add-grade-indexes'):
+        main.upsert_grades([row])
+    db.session.rollback()
+    assert Grade.query.count() == 0
+
+    # Workers report it with their first request
+    main._grade_upsert_key['checked'] = False
+    main.app.test_client().get('/login')
+    assert main._grade_upsert_key['checked']
+    assert not main._grade_upsert_key['present']
+
+
+def test_add_grade_indexes_merges_duplicates_and_adds_the_key(make):
+    recreate_grade_table_without_key()
+    students = [make.student() for _ in range(3)]
+    subject = make.subject()
+    approver = make.user()
+    # As saves without the key left them: the first row, then one inserted per later save
+    first = make.grade(students[0], subject, 80.0, is_locked=True, approved_by=approver.id)
+    make.grade(students[0], subject, 85.0)
+    make.grade(students[0], subject, 93.0)
+    make.grade(students[1], subject, 88.0)
+    make.grade(students[1], subject, 77.0)
+    single = make.grade(students[2], subject, 90.0)
+    db.session.commit()
+    first_id, single_id = first.id, single.id
+
+    runner = main.app.test_cli_runner()
+    result = runner.invoke(args=['add-grade-indexes', '--dry-run'])
+    assert '3 duplicate grade row(s) for 2 student/subject/term(s) would be merged' in result.output
+    assert Grade.query.count() == 6
+
+    result = runner.invoke(args=['add-grade-indexes'])
+    assert result.exit_code == 0, result.output
+    assert f'{KEY}: created' in result.output
+    db.session.expire_all()
+    grades = {grade.student_id: grade for grade in Grade.query.all()}
+    assert len(grades) == 3
+    kept = grades[students[0].id]
+    assert (kept.id, kept.final_average, kept.is_locked, kept.approved_by) == (first_id, 93.0, True, approver.id)
+    assert grades[students[1].id].final_average == 77.0
+    assert grades[students[2].id].id == single_id
+    summary = main.StudentTermSummary.query.filter_by(student_id=students[0].id).one()
+    assert (summary.enrolled_count, summary.units) == (1, subject.units)
+
+    # Upserts work again, and update the merged row
+    assert main.grade_upsert_key_present()
+    main.upsert_grades([grade_row(students[0], subject, 99.0)])
+    db.session.commit()
+    assert Grade.query.filter_by(student_id=students[0].id).one().final_average == 99.0
+
+    result = runner.invoke(args=['add-grade-indexes'])
+    assert 'Merged 0 duplicate grade row(s)' in result.output
+    assert f'{KEY}: already present' in result.output
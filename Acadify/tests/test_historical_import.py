@@ -0,0 +1,120 @@
+"""Historical grade imports: streamed CSV/XLSX files written in chunked upserts"""
+import io
+import json
+
+import pytest
+from openpyxl import Workbook
+
+import main
+from main import Grade, ImportJob, db
+
+HEADER = ['student_id', 'subject_code', 'semester', 'academic_year', 'prelim_grade', 'midterm_grade', 'final_grade']
+
+
+@pytest.fixture
+def term(make):
+    """Three students and two subjects of 2023-2024, first semester"""
+    students = [make.student(student_id=f'2023-{n:05d}') for n in range(3)]
+    subjects = [make.subject(subject_code=code, academic_year='2023-2024') for code in ('HIST1', 'HIST2')]
+    db.session.commit()
+    return students, subjects
+
+
+def csv_file(rows):
+    return '\n'.join(','.join(str(value) for value in row) for row in [HEADER] + rows).encode()
+
+
+def xlsx_file(rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(HEADER)
+    for row in rows:
+        # None rows are left blank, as spreadsheets often have them
+        sheet.append(row or [])
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def import_file(client, data, file_name):
+    response = client.post('/api/import-historical-grades', data={'file': (io.BytesIO(data), file_name)},
+                           content_type='multipart/form-data')
+    assert response.status_code == 202, response.json
+    main.import_job_runner._process(response.json['job_id'])
+    db.session.expire_all()
+    return db.session.get(ImportJob, response.json['job_id'])
+
+
+def stored_grades():
+    db.session.expire_all()
+    return {(grade.student.student_id, grade.subject.subject_code): (grade.final_average, grade.remarks, grade.import_source)
+            for grade in Grade.query}
+
+
+def imported(final_average, import_source='CSV Import'):
+    return final_average, main.calculate_grade_equivalent(final_average)[1], import_source
+
+
+def test_csv_import_creates_and_updates_grades(make, client_as, term):
+    client = client_as(make.user())
+    db.session.commit()
+    rows = [['2023-00000', 'HIST1', 1, '2023-2024', 90, 90, 90],
+            ['2023-00001', 'HIST1', 1, '2023-2024', 80, 85, 90],
+            ['2023-00009', 'HIST1', 1, '2023-2024', 90, 90, 90],
+            ['2023-00002', 'NOPE', 1, '2023-2024', 90, 90, 90],
+            ['2023-00002', 'HIST2', 1, '2023-2024', 70, 'x', 90]]
+
+    job = import_file(client, csv_file(rows), 'grades.csv')
+    assert (job.status, job.created_count, job.updated_count, job.error_count) == ('completed', 2, 0, 3)
+    assert json.loads(job.error_details) == [
+        "Row 4: Student ID '2023-00009' not found",
+        "Row 5: Subject 'NOPE' not found",
+        'Row 6: Invalid midterm grade format'
+    ]
+    assert stored_grades() == {('2023-00000', 'HIST1'): imported(90.0), ('2023-00001', 'HIST1'): imported(85.0)}
+
+    # The same grade imported again is updated in place
+    job = import_file(client, csv_file([['2023-00000', 'HIST1', 1, '2023-2024', 70, 70, 70]]), 'again.csv')
+    assert (job.created_count, job.updated_count) == (0, 1)
+    assert stored_grades()[('2023-00000', 'HIST1')] == imported(70.0)
+    assert Grade.query.count() == 2
+
+
+def test_xlsx_errors_name_the_sheet_rows(make, client_as, term):
+    client = client_as(make.user())
+    db.session.commit()
+    rows = [['2023-00000', 'HIST1', 1, '2023-2024', 90, 90, 90],
+            None,
+            ['2023-00001', 'HIST1', 1, '2023-2024', 90, 90, 101]]
+
+    job = import_file(client, xlsx_file(rows), 'grades.xlsx')
+    assert (job.created_count, job.error_count) == (1, 1)
+    # The blank row 3 is skipped but still counted
+    assert json.loads(job.error_details) == ['Row 4: Invalid final grade 101.0']
+    assert stored_grades() == {('2023-00000', 'HIST1'): imported(90.0, 'Excel Import')}
+
+
+def committed_grades():
+    """Grade rows another connection sees"""
+    with db.engine.connect() as connection:
+        return connection.scalar(db.select(db.func.count()).select_from(Grade.__table__))
+
+
+def test_each_chunk_commits_and_a_later_row_replaces_an_earlier_one(term):
+    rows = [(row_num, dict(zip(HEADER, values))) for row_num, values in enumerate([
+        ['2023-00000', 'HIST1', 1, '2023-2024', 90, 90, 90],
+        ['2023-00000', 'HIST1', 1, '2023-2024', 80, 80, 80],
+        ['2023-00001', 'HIST1', 1, '2023-2024', 90, 90, 90],
+        ['2023-00002', 'HIST1', 1, '2023-2024', 90, 90, 90],
+        ['2023-00002', 'HIST2', 1, '2023-2024', 90, 90, 90],
+    ], start=2)]
+
+    seen = []
+    for progress in main.import_historical_grade_rows(rows, 'CSV Import', chunk_size=2):
+        # Everything reported so far is already committed
+        seen.append((progress['processed'], committed_grades(), progress['done']))
+    assert seen == [(3, 2, False), (5, 4, False), (5, 4, True)]
+    assert stored_grades()[('2023-00000', 'HIST1')][0] == 80.0
+
+    summaries = main.StudentTermSummary.query.filter_by(academic_year='2023-2024').count()
+    assert summaries == 3
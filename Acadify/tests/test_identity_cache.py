@@ -0,0 +1,130 @@
+"""load_user's identity cache: served from memory until an account change is committed"""
+import pytest
+from flask import g
+from sqlalchemy import event
+
+import main
+from main import ChangeFeedEvent, Student, User, db
+
+
+@pytest.fixture
+def account_queries(app):
+    """SELECTs on the account tables, as a list that grows"""
+    queries = []
+    tables = (f'FROM {User.__tablename__}', f'FROM {Student.__tablename__}')
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT') and any(table in statement for table in tables):
+            queries.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield queries
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def load(key):
+    """load_user as a fresh request would call it"""
+    db.session.expire_all()
+    return main.load_user(key)
+
+
+def identity_events():
+    return [(event.entity_id, event.action) for event in ChangeFeedEvent.query.filter_by(resource='identities')]
+
+
+def test_repeat_loads_are_served_from_the_cache(make, account_queries):
+    user = make.user('instructor')
+    db.session.commit()
+    key = f'user_{user.id}'
+    account_queries.clear()
+
+    first, second = load(key), load(key)
+    assert (first.role, second.role, second.get_id()) == ('instructor', 'instructor', key)
+    assert len(account_queries) == 1
+    assert main.identity_cache.hits == 1
+
+
+@pytest.mark.parametrize('field, value', [('role', 'registrar'), ('active', False)])
+def test_committed_account_change_is_seen_on_the_next_load(make, field, value):
+    user = make.user('instructor')
+    db.session.commit()
+    assert getattr(load(f'user_{user.id}'), field) != value
+
+    setattr(user, field, value)
+    db.session.commit()
+    assert getattr(load(f'user_{user.id}'), field) == value
+    assert identity_events() == [(user.id, 'updated')]
+
+
+def test_uncached_field_change_keeps_the_cache(make):
+    student = make.student()
+    db.session.commit()
+    load(f'student_{student.id}')
+
+    student.gwa = 1.5
+    db.session.commit()
+    hits = main.identity_cache.hits
+    load(f'student_{student.id}')
+    assert main.identity_cache.hits == hits + 1
+    assert identity_events() == []
+
+
+def test_password_reset_invalidates_the_account(make, client_as):
+    student = make.student()
+    db.session.commit()
+    load(f'student_{student.id}')
+
+    response = client_as(make.user('mis_it')).post('/api/reset-password', json={'user_id': student.id, 'new_password': 'n3w'})
+    assert response.json['status'] == 'success'
+    assert identity_events() == [(student.id, 'updated')]
+    assert main.identity_cache.entries == {}
+
+
+def test_deleted_student_is_logged_out(make, client_as):
+    student = make.student()
+    db.session.commit()
+    client = client_as(student)
+    assert client.get('/api/student/progress-data').status_code == 200
+
+    db.session.delete(student)
+    db.session.commit()
+    assert identity_events() == [(student.id, 'deleted')]
+    assert load(f'student_{student.id}') is None
+    # Flask-Login keeps the loaded user on g, which the test's app context shares between requests
+    g.pop('_login_user', None)
+    assert client.get('/api/student/progress-data').status_code != 200
+
+
+def test_bulk_updates_and_deletes_invalidate_only_on_identity_columns(make):
+    users = [make.user('instructor') for _ in range(2)]
+    db.session.commit()
+    load(f'user_{users[0].id}')
+
+    User.query.filter(User.role == 'instructor').update({'theme_preference': 'dark'})
+    db.session.commit()
+    assert load(f'user_{users[0].id}').theme_preference == 'dark'
+
+    # Per-row bulk updates of other columns leave the cache alone
+    db.session.execute(db.update(User), [{'id': user.id, 'email': f'bulk{user.id}@example.com'} for user in users])
+    db.session.commit()
+    assert identity_events() == [(None, 'updated')]
+
+    User.query.filter_by(id=users[1].id).delete()
+    db.session.commit()
+    assert identity_events() == [(None, 'updated'), (None, 'deleted')]
+    assert load(f'user_{users[1].id}') is None
+
+
+def test_another_process_change_is_seen_once_the_feed_is_rechecked(make):
+    user = make.user('instructor')
+    db.session.commit()
+    load(f'user_{user.id}')
+
+    # Another process commits a role change and its feed event; no hooks of ours run
+    with db.engine.begin() as connection:
+        connection.execute(db.update(User.__table__).where(User.__table__.c.id == user.id).values(role='dean'))
+        connection.execute(db.insert(ChangeFeedEvent.__table__).values(resource='identities', entity_id=user.id))
+    assert load(f'user_{user.id}').role == 'instructor'
+
+    # CHANGE_FEED_HEAD_TTL later
+    main.identity_cache.feed_checked_at = 0.0
+    assert load(f'user_{user.id}').role == 'dean'
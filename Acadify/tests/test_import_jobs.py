@@ -0,0 +1,121 @@
+"""Bulk imports run as checkpointed import jobs"""
+import io
+
+import pytest
+
+import main
+from main import ImportJob, ImportJobRow, Student, db
+
+
+@pytest.fixture
+def fast_hashing(monkeypatch):
+    # Real password hashes take a tenth of a second each; these tests only need a value
+    monkeypatch.setattr(main, 'generate_password_hash', lambda password: f'plain:{password}')
+    monkeypatch.setitem(main.app.config, 'STUDENT_IMPORT_HASH_WORKERS', 1)
+
+
+def student_csv(rows, repeat_every=None):
+    """Freshmen rows; every repeat_every-th row reuses the previous row's username"""
+    lines = ['username,email,password,first_name,last_name,student_id,department,year_level,semester']
+    for n in range(rows):
+        username = f'new{n - 1}' if repeat_every and n % repeat_every == repeat_every - 1 else f'new{n}'
+        lines.append(f'{username},new{n}@example.com,Secret{n}!,First{n},Last{n},N{n:06d},BSIT,1,1')
+    return '\n'.join(lines).encode()
+
+
+def queue_students(client, data):
+    response = client.post('/api/import-students', data={'file': (io.BytesIO(data), 'students.csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 202, response.json
+    return response.json['job_id']
+
+
+def run_job(job_id):
+    """Run a queued job here instead of on a worker thread"""
+    main.import_job_runner._process(job_id)
+    db.session.expire_all()
+    return db.session.get(ImportJob, job_id)
+
+
+def test_large_student_import_reports_every_row(make, client_as, fast_hashing):
+    client = client_as(make.user())
+    db.session.commit()
+
+    job = run_job(queue_students(client, student_csv(3000, repeat_every=100)))
+    assert (job.status, job.created_count, job.error_count) == ('completed', 2970, 30)
+    assert ImportJobRow.query.filter_by(job_id=job.id).count() == 3000
+
+    status = client.get(f'/api/import-jobs/{job.id}').json['job']
+    report = status['report']
+    assert [entry['row'] for entry in report] == list(range(2, 3002))
+    assert report[0] == {'row': 2, 'student_id': 'N000000', 'username': 'new0', 'status': 'created'}
+    assert report[99] == {'row': 101, 'student_id': 'N000099', 'username': 'new98', 'status': 'error',
+                          'message': "Username 'new98' appears more than once in the file"}
+
+
+def test_student_import_is_for_registrars(make, client_as):
+    client = client_as(make.user('instructor'))
+    db.session.commit()
+
+    assert client.post('/api/import-students').status_code == 403
+    assert ImportJob.query.count() == 0
+
+
+def test_student_import_route_checks_the_upload_and_caps_error_details(make, client_as, fast_hashing):
+    client = client_as(make.user())
+    db.session.commit()
+
+    assert client.post('/api/import-students', data={}, content_type='multipart/form-data').status_code == 400
+
+    job = run_job(queue_students(client, student_csv(60, repeat_every=2)))
+    assert (job.status, job.created_count, job.error_count) == ('completed', 30, 30)
+    status = client.get(f'/api/import-jobs/{job.id}').json['job']
+    # The per-row report has every error; the summary keeps the first ten, as grade imports do
+    assert status['error_details'] == [f"Row {n + 2}: Username 'new{n - 1}' appears more than once in the file"
+                                       for n in range(1, 20, 2)]
+    assert sum(entry['status'] == 'error' for entry in status['report']) == 30
+
+
+def test_resumed_student_import_reports_each_row_once(make, client_as, fast_hashing, monkeypatch):
+    client = client_as(make.user())
+    db.session.commit()
+    job_id = queue_students(client, student_csv(1000))
+
+    hash_student_passwords = main.hash_student_passwords
+    calls = []
+
+    def dies_on_third_chunk(passwords, executor=None, workers=1):
+        calls.append(len(passwords))
+        if len(calls) == 3:
+            raise RuntimeError('worker died')
+        return hash_student_passwords(passwords, executor, workers)
+
+    monkeypatch.setattr(main, 'hash_student_passwords', dies_on_third_chunk)
+    with pytest.raises(RuntimeError):
+        main.import_job_runner._process(job_id)
+    db.session.rollback()
+    job = db.session.get(ImportJob, job_id)
+    assert job.checkpoint_row == 2 * main.STUDENT_IMPORT_CHUNK_SIZE + 1
+    assert ImportJobRow.query.filter_by(job_id=job_id).count() == 2 * main.STUDENT_IMPORT_CHUNK_SIZE
+
+    monkeypatch.setattr(main, 'hash_student_passwords', hash_student_passwords)
+    job = run_job(job_id)
+    assert (job.status, job.created_count, Student.query.count()) == ('completed', 1000, 1000)
+    rows = [row for (row,) in db.session.query(ImportJobRow.file_row).filter_by(job_id=job_id)]
+    assert sorted(rows) == list(range(2, 1002))
+
+
+def test_password_hashing_pool_is_shared(monkeypatch):
+    monkeypatch.setitem(main._student_hash_pool, 'executor', None)
+    monkeypatch.setitem(main._student_hash_pool, 'workers', 0)
+    assert main.student_hash_executor(1) is None
+
+    executor = main.student_hash_executor(2)
+    try:
+        assert main.student_hash_executor(2) is executor
+        assert executor._mp_context.get_start_method() == 'forkserver'
+        passwords = [f'Secret{n}!' for n in range(4)]
+        hashes = main.hash_student_passwords(passwords, executor, 2)
+        assert all(main.check_password_hash(hashed, password) for hashed, password in zip(hashes, passwords))
+    finally:
+        executor.shutdown()
@@ -0,0 +1,63 @@
+"""Read replica routing with a primary and a replica bind"""
+import pytest
+
+import main
+from main import Student, db
+
+
+def counts(router):
+    return dict(router.query_counts)
+
+
+def test_reads_of_read_only_sessions_go_to_the_replica(replica):
+    router = replica.router
+    assert Student.query.count() == 1
+
+    assert router.available()
+    before = counts(router)
+    with main.read_replica():
+        assert Student.query.count() == 0
+        assert db.session.scalar(db.select(db.func.count(Student.id))) == 0
+    after = counts(router)
+    assert after['replica'] - before['replica'] == 2
+    assert after['primary'] == before['primary']
+    assert router.get_metrics()['replica_healthy'] is True
+
+
+def test_session_that_wrote_stays_on_the_primary(replica, make):
+    with main.read_replica():
+        make.student()
+        before = counts(replica.router)
+        assert Student.query.count() == 2
+    assert counts(replica.router)['replica'] == before['replica']
+
+
+def test_read_is_repeated_on_the_primary_when_the_replica_went_down(replica):
+    router = replica.router
+    with main.read_replica():
+        assert Student.query.count() == 0
+    db.session.remove()
+
+    # Down since the last health check, which still says healthy
+    replica.down = True
+    assert router.available()
+    with main.read_replica():
+        before = counts(router)
+        assert Student.query.count() == 1
+        assert db.session.scalars(db.select(Student.id)).all() != []
+    after = counts(router)
+
+    assert after['replica'] == before['replica']
+    assert after['primary'] - before['primary'] == 2
+    metrics = router.get_metrics()
+    assert metrics['replica_healthy'] is False
+    assert metrics['primary_fallbacks'] == 1
+    assert 'unable to open database file' in metrics['last_error']
+
+
+def test_errors_on_the_primary_are_not_retried(replica):
+    from sqlalchemy.exc import OperationalError
+
+    with main.read_replica(), pytest.raises(OperationalError):
+        db.session.execute(db.text('SELECT * FROM no_such_table'))
+    assert replica.router.fallbacks == 0
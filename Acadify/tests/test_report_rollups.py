@@ -0,0 +1,112 @@
+"""Folding new rows into the system report rollups"""
+from datetime import datetime, timedelta
+
+import main
+from main import AuditLog, DailyRollup, RollupGap, RollupWatermark, db, report_rollups
+
+
+def add_audit(row_id, age=120, action='login', status='success'):
+    """Commit an audit row with a chosen id, created ``age`` seconds ago"""
+    db.session.add(AuditLog(id=row_id, action=action, description=f'entry {row_id}', status=status,
+                            created_at=datetime.utcnow() - timedelta(seconds=age)))
+    db.session.commit()
+
+
+def folded_audit_rows():
+    return sum(row.count for row in DailyRollup.query.filter_by(metric='audit'))
+
+
+def watermark():
+    return db.session.get(RollupWatermark, 'audit').last_id
+
+
+def gap_ids():
+    return sorted(gap.row_id for gap in RollupGap.query.filter_by(source='audit'))
+
+
+def test_refresh_folds_settled_rows_once(app):
+    add_audit(1)
+    add_audit(2, status='failed')
+    add_audit(3, action='logout')
+    add_audit(4, age=0)
+
+    assert report_rollups.refresh()['audit'] == 3
+    assert watermark() == 3
+    assert report_rollups.refresh()['audit'] == 0
+    assert folded_audit_rows() == 3
+
+    # The report adds the row past the watermark that is still settling
+    totals, series, counted_at = report_rollups.report()
+    assert sum(series['audit'].values()) == 4
+    failed_login = db.session.get(AuditLog, 2)
+    assert series['audit'][(failed_login.created_at.date(), 'login', 'failed')] == 1
+
+
+def test_row_committing_below_the_watermark_is_folded_from_its_gap(app):
+    add_audit(1)
+    add_audit(3)
+
+    # 2 was allocated before 3 but its transaction has not committed yet
+    assert report_rollups.refresh()['audit'] == 2
+    assert watermark() == 3
+    assert gap_ids() == [2]
+
+    add_audit(2, age=150)
+    assert report_rollups.refresh()['audit'] == 1
+    assert gap_ids() == []
+    assert folded_audit_rows() == 3
+    assert report_rollups.refresh()['audit'] == 0
+
+
+def test_old_holes_and_expired_gaps_are_forgotten(app):
+    old = main.ROLLUP_GAP_SECONDS + 60
+    add_audit(1, age=old)
+    add_audit(5, age=old)
+    db.session.add(RollupGap(source='audit', row_id=99, created_at=datetime.utcnow() - timedelta(seconds=old)))
+    db.session.commit()
+
+    assert report_rollups.refresh()['audit'] == 2
+    # Holes in front of rows that old are deletes or rollbacks, not open transactions
+    assert gap_ids() == []
+
+
+def test_fold_stops_when_another_worker_moved_the_watermark(app, monkeypatch):
+    add_audit(1)
+    add_audit(2)
+    report_rollups.refresh()
+    add_audit(3)
+    add_audit(4)
+    count = report_rollups._count
+
+    def count_then_lose_the_race(source, after_id, upto_id=None, **kwargs):
+        counts = count(source, after_id, upto_id, **kwargs)
+        if source.table is AuditLog.__table__ and upto_id is not None:
+            # Another worker folds the same range and commits first
+            with db.engine.begin() as connection:
+                connection.execute(RollupWatermark.__table__.update().where(
+                    RollupWatermark.__table__.c.source == 'audit'
+                ).values(last_id=upto_id))
+        return counts
+    monkeypatch.setattr(report_rollups, '_count', count_then_lose_the_race)
+
+    assert report_rollups.refresh()['audit'] == 0
+    db.session.expire_all()
+    assert watermark() == 4
+    assert folded_audit_rows() == 2
+
+
+def test_rebuild_folds_the_live_rows_again_without_double_counting(app):
+    add_audit(1)
+    add_audit(2)
+    add_audit(4)
+    report_rollups.refresh()
+    assert gap_ids() == [3]
+
+    report_rollups.rebuild()
+    assert watermark() == 0
+    assert folded_audit_rows() == 0
+    assert gap_ids() == []
+
+    assert report_rollups.refresh()['audit'] == 3
+    assert folded_audit_rows() == 3
+    assert gap_ids() == [3]
@@ -0,0 +1,149 @@
+"""System resources from the background sampler: one sampling process per host, shared through files"""
+import json
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+import psutil
+import pytest
+
+import main
+
+GB = 1024 ** 3
+
+
+class SamplerApp:
+    """The app as this test's samplers see it: its own sample directory and history size.
+
+    The app's own sampler thread, started by earlier requests, keeps main.app.config's
+    directory, so it cannot publish into this test's.
+    """
+
+    def __init__(self, sample_dir):
+        self.sample_dir = sample_dir
+        self.config = dict(main.app.config, RESOURCE_SAMPLE_DIR=str(sample_dir), RESOURCE_HISTORY_SIZE=3)
+
+    def app_context(self):
+        return main.app.app_context()
+
+
+@pytest.fixture
+def sampler_app(app, tmp_path):
+    return SamplerApp(tmp_path)
+
+
+def new_sampler(sampler_app):
+    """A sampler set up as start() leaves it, for this test to drive instead of its thread"""
+    sampler = main.ResourceSampler(sampler_app)
+    sampler.samples = deque(maxlen=sampler.app.config['RESOURCE_HISTORY_SIZE'])
+    sampler.worker_path = os.path.join(sampler.app.config['RESOURCE_SAMPLE_DIR'], f'worker-{os.getpid()}.json')
+    sampler.process = psutil.Process()
+    sampler.thread = object()
+    sampler.first_sample.set()
+    return sampler
+
+
+def sample(timestamp, cpu=10.0, sent=0, received=0):
+    return {
+        'timestamp': timestamp, 'cpu_percent': cpu, 'cpu_cores': 4, 'cpu_frequency_mhz': 2400,
+        'memory_percent': 50.0, 'memory_used': 4 * GB, 'memory_total': 8 * GB,
+        'disk_percent': 90.0, 'disk_used': 90 * GB, 'disk_total': 100 * GB, 'disk_free': 10 * GB,
+        'network_sent': sent, 'network_received': received, 'processes': 100,
+        'boot_time': timestamp - 7200, 'database_size_mb': 0
+    }
+
+
+def test_one_process_samples_and_the_others_read_its_samples(sampler_app):
+    leader, follower = new_sampler(sampler_app), new_sampler(sampler_app)
+    assert leader._hold_lock() and not follower._hold_lock()
+
+    for _ in range(4):
+        leader._sample(psutil)
+    # The ring buffer keeps RESOURCE_HISTORY_SIZE samples
+    assert len(leader.samples) == 3
+    published = json.loads((sampler_app.sample_dir / 'samples.json').read_text())['samples']
+    assert published == list(leader.samples)
+    assert follower.snapshot() == leader.snapshot()
+
+    # The leader exits; the follower takes the lock and carries on with its history
+    leader.lock_file.close()
+    assert follower._hold_lock()
+    follower._sample(psutil)
+    assert list(follower.samples)[:2] == published[1:]
+
+
+def test_snapshot_reports_the_latest_sample_and_network_rates(sampler_app):
+    sampler = new_sampler(sampler_app)
+    sampler._hold_lock()
+    # Whole seconds, so the since timestamp round-trips exactly
+    start = int(time.time()) - 30
+    sampler.samples.extend([sample(start, sent=0), sample(start + 10, sent=10240, received=2048),
+                            sample(start + 20, cpu=90.0, sent=30720, received=2048)])
+
+    data = sampler.snapshot()
+    assert (data['cpu']['percent'], data['cpu']['status'], data['cpu']['status_text']) == (90.0, 'error', 'Critical')
+    assert (data['memory']['used_gb'], data['storage']['free_gb'], data['storage']['status']) == (4.0, 10.0, 'error')
+    assert data['system']['uptime_hours'] == 2.0
+    assert [(point['sent_kbps'], point['received_kbps']) for point in data['history']] == [(0.0, 0.0), (1.0, 0.2), (2.0, 0.0)]
+    assert (data['network']['sent_kbps'], data['network']['received_kbps']) == (2.0, 0.0)
+
+    # ?since= trims the history but not the rates
+    since = datetime.fromtimestamp(start + 10)
+    assert [point['sent_kbps'] for point in sampler.snapshot(since=since)['history']] == [2.0]
+
+
+def test_worker_totals_skip_stale_files_and_drop_dead_ones(sampler_app):
+    sampler = new_sampler(sampler_app)
+    sampler._hold_lock()
+    sampler.samples.append(sample(time.time()))
+    sampler._write_worker(psutil)
+
+    stale = time.time() - 10 * sampler.app.config['RESOURCE_SAMPLE_SECONDS']
+    dead = next(pid for pid in range(999999, 0, -1) if not psutil.pid_exists(pid))
+    for pid, sampled_at in ((os.getppid(), stale), (dead, stale)):
+        (sampler_app.sample_dir / f'worker-{pid}.json').write_text(json.dumps(
+            {'pid': pid, 'rss_mb': 100.0, 'cpu_percent': 50.0, 'threads': 7, 'started_at': 0, 'sampled_at': sampled_at}
+        ))
+
+    workers = sampler.snapshot()['workers']
+    assert [worker['pid'] for worker in workers['processes']] == [os.getpid()]
+    assert workers['count'] == 1
+    # A live process that fell behind keeps its file; a dead one's is removed
+    assert (sampler_app.sample_dir / f'worker-{os.getppid()}.json').exists()
+    assert not (sampler_app.sample_dir / f'worker-{dead}.json').exists()
+
+
+def test_endpoint_answers_from_the_sampler(sampler_app, make, client_as, monkeypatch):
+    sampler = new_sampler(sampler_app)
+    monkeypatch.setattr(main, 'resource_sampler', sampler)
+    client = client_as(make.user('mis_it'))
+    main.db.session.commit()
+
+    # A follower that started before any sample was published
+    assert client.get('/api/system-resources').status_code == 503
+
+    sampler._hold_lock()
+    sampler.samples.append(sample(time.time()))
+    response = client.get('/api/system-resources', query_string={'since': 'not a date'})
+    assert response.json['data']['cpu']['percent'] == 10.0
+    assert len(response.json['data']['history']) == 1
+
+
+def test_endpoint_is_mis_it_only(sampler_app, make, client_as):
+    client = client_as(make.user('registrar'))
+    main.db.session.commit()
+    assert client.get('/api/system-resources').status_code == 403
+
+
+def test_without_psutil_the_endpoint_simulates(sampler_app, make, client_as, monkeypatch):
+    sampler = main.ResourceSampler(sampler_app)
+    monkeypatch.setattr(main, 'resource_sampler', sampler)
+    monkeypatch.setitem(sys.modules, 'psutil', None)
+    client = client_as(make.user('mis_it'))
+    main.db.session.commit()
+
+    response = client.get('/api/system-resources')
+    assert response.json['data']['cpu']['status_text'] == 'Simulated'
+    assert sampler.thread is None
@@ -0,0 +1,91 @@
+"""Grade saves are limited to the grading periods open for the instructor"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+from main import ClassAssignment, EncodingException, GradeEncodingSchedule, Grade, StudentSubject, db
+
+
+@pytest.fixture
+def sheet(make):
+    """An instructor's subject with one enrolled student, and no encoding schedule"""
+    instructor, subject, student = make.user(role='instructor'), make.subject(), make.student()
+    db.session.add(ClassAssignment(subject_id=subject.id, instructor_id=instructor.id,
+                                   school_year=subject.academic_year, semester=subject.semester))
+    db.session.add(StudentSubject(student_id=student.id, subject_id=subject.id,
+                                  academic_year=subject.academic_year, semester=subject.semester))
+    db.session.commit()
+    return instructor, subject, student
+
+
+def grant(make, instructor, subject, grading_period):
+    exception = EncodingException(instructor_id=instructor.id, academic_year=subject.academic_year,
+                                  semester=subject.semester, grading_period=grading_period,
+                                  expiration_date=datetime.now() + timedelta(days=1), granted_by=make.user().id)
+    db.session.add(exception)
+    db.session.flush()
+    # As the grant route does; the commit drops the cached encoding windows
+    main.record_change('exceptions', exception.id, 'granted')
+    db.session.commit()
+
+
+def save(client, subject, student, **grades):
+    return client.post('/api/save-grades', json={'subject_id': subject.id, 'grades': [
+        dict({'student_id': student.id, 'prelim': '', 'midterm': '', 'final': ''}, **grades)
+    ]})
+
+
+def stored(student):
+    db.session.expire_all()
+    grade = Grade.query.filter_by(student_id=student.id).one()
+    return grade.prelim_grade, grade.midterm_grade, grade.final_grade
+
+
+def test_nothing_open_refuses_the_save(sheet, client_as):
+    instructor, subject, student = sheet
+    response = save(client_as(instructor), subject, student, prelim=85)
+    assert response.status_code == 403
+
+
+def test_prelim_exception_only_opens_prelim(make, sheet, client_as):
+    instructor, subject, student = sheet
+    grant(make, instructor, subject, 'prelim')
+    client = client_as(instructor)
+
+    assert save(client, subject, student, prelim=85).status_code == 200
+    assert stored(student) == (85.0, None, None)
+
+    response = save(client, subject, student, prelim=86, midterm=90, final=92)
+    assert response.status_code == 400
+    assert response.json['errors'][0]['message'] == 'Midterm grades are not open for encoding'
+    assert stored(student) == (85.0, None, None)
+
+
+def test_closed_periods_may_be_resent_unchanged(make, sheet, client_as):
+    instructor, subject, student = sheet
+    make.grade(student, subject, prelim_grade=80.0, midterm_grade=82.0)
+    db.session.commit()
+    grant(make, instructor, subject, 'final')
+
+    response = save(client_as(instructor), subject, student, prelim='80', midterm=82, final=90)
+    assert response.status_code == 200, response.json
+    assert stored(student) == (80.0, 82.0, 90.0)
+
+
+def test_all_periods_exception_and_period_schedules_combine(make, sheet, client_as):
+    instructor, subject, student = sheet
+    now = datetime.now()
+    db.session.add(GradeEncodingSchedule(academic_year=subject.academic_year, semester=subject.semester,
+                                         grading_period='midterm', start_date=now - timedelta(days=1),
+                                         end_date=now + timedelta(days=1), status='active',
+                                         created_by=make.user(role='mis_it').id))
+    db.session.commit()
+    client = client_as(instructor)
+
+    assert save(client, subject, student, midterm=88).status_code == 200
+    assert save(client, subject, student, prelim=80, midterm=88).status_code == 400
+
+    grant(make, instructor, subject, 'all')
+    assert save(client, subject, student, prelim=80, midterm=88, final=91).status_code == 200
+    assert stored(student) == (80.0, 88.0, 91.0)
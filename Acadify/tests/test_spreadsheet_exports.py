@@ -0,0 +1,123 @@
+"""Cached grade sheet workbooks: layout, cache hits and invalidation"""
+import io
+import os
+
+import pytest
+from openpyxl import load_workbook
+from werkzeug.datastructures import MultiDict
+
+import main
+from main import db
+
+TERM = {'academic_year': '2024-2025', 'semester': 1}
+
+
+@pytest.fixture
+def export_dir(app, monkeypatch, tmp_path):
+    directory = tmp_path / 'exports'
+    monkeypatch.setitem(main.app.config, 'EXPORT_CACHE_DIR', str(directory))
+    return directory
+
+
+@pytest.fixture
+def graded(make):
+    """Two subjects with two graded students each; returns the expected sheet rows in order"""
+    students = [make.student(student_id='2024-00002', last_name='Santos'),
+                make.student(student_id='2024-00001', last_name='Reyes')]
+    subjects = [make.subject(subject_code=code) for code in ('MATH101', 'CS101')]
+    rows = []
+    for subject in subjects:
+        for student in students:
+            make.grade(student, subject, 85.0 + len(rows))
+            rows.append((student.student_id, subject.subject_code))
+    db.session.commit()
+    return sorted(rows, key=lambda row: (row[1], row[0]))
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Grade sheet queries run, i.e. workbooks built rather than sent from the cache"""
+    calls = []
+    query = main.grade_sheet_query.query
+
+    def counting_query(filters, *columns):
+        calls.append(filters)
+        return query(filters, *columns)
+    monkeypatch.setattr(main.grade_sheet_query, 'query', counting_query)
+    return calls
+
+
+def download(client):
+    response = client.get('/registrar/grade-sheet/export', query_string=TERM)
+    assert response.status_code == 200
+    assert response.mimetype == main.XLSX_MIMETYPE
+    return load_workbook(io.BytesIO(response.get_data()))['Sheet1']
+
+
+def test_grade_sheet_follows_the_format_file_layout(make, client_as, export_dir, graded):
+    sheet = download(client_as(make.user()))
+
+    assert sheet['I7'].value == main.COLLEGE_NAME
+    assert sheet['H8'].value == main.COLLEGE_ADDRESS
+    assert {'I7:L7', 'H8:M8', 'D11:E11', 'F11:G11'} <= {str(cells) for cells in sheet.merged_cells.ranges}
+    header = main.SpreadsheetExports.GRADE_SHEET_HEADER_ROW
+    assert [sheet[f'{first}{header}'].value for _, first, _ in main.SpreadsheetExports.GRADE_SHEET_COLUMNS] == [
+        'student_id', 'subject_code', 'semester', 'academic_year', 'prelim_grade', 'midterm_grade', 'final_grade'
+    ]
+    body = [(sheet[f'D{row}'].value, sheet[f'F{row}'].value) for row in range(header + 1, sheet.max_row + 1)]
+    assert body == graded
+    assert sheet[f'H{header + 1}'].value == 1
+    assert sheet[f'I{header + 1}'].value == '2024-2025'
+
+
+def test_repeat_download_is_sent_from_the_cache_until_grades_change(make, client_as, export_dir, graded, builds):
+    client = client_as(make.user())
+    download(client)
+    download(client)
+    assert len(builds) == 1
+    assert len(os.listdir(export_dir)) == 1
+
+    grade = main.Grade.query.first()
+    grade.final_grade = 99.0
+    main.record_change(f'grades:{grade.subject_id}', grade.id)
+    db.session.commit()
+
+    sheet = download(client)
+    assert len(builds) == 2
+    # The older version of the same export is pruned
+    assert len(os.listdir(export_dir)) == 1
+    assert 99.0 in [cell.value for cell in sheet['O']]
+
+
+def test_export_opened_before_a_prune_is_still_sent_whole(export_dir, graded):
+    filters = main.GradeSheetQuery.filters_from_args(MultiDict(TERM))
+    built = main.spreadsheet_exports.grade_sheet(filters)
+    cached = main.spreadsheet_exports.grade_sheet(filters)
+    assert os.listdir(export_dir) == [os.path.basename(cached.name)]
+
+    # A grade changes while both downloads are still waiting to be sent
+    main.record_change('enrollments')
+    db.session.commit()
+    rebuilt = main.spreadsheet_exports.grade_sheet(filters)
+    assert not os.path.exists(cached.name)
+    assert len(os.listdir(export_dir)) == 1
+
+    for export_file in (built, cached, rebuilt):
+        with export_file:
+            assert load_workbook(io.BytesIO(export_file.read()))['Sheet1']['D12'].value == graded[0][0]
+
+
+def test_export_reads_its_version_and_rows_from_the_primary(make, client_as, export_dir, graded, replica):
+    client = client_as(make.user())
+    main.record_change('enrollments')
+    db.session.commit()
+    db.session.remove()
+    assert replica.router.available()
+
+    before = dict(replica.router.query_counts)
+    sheet = download(client)
+    header = main.SpreadsheetExports.GRADE_SHEET_HEADER_ROW
+    # The replica has no grades at all
+    assert sheet.max_row - header == len(graded)
+    assert [name.rsplit('-', 1)[1] for name in os.listdir(export_dir)] == ['1.xlsx']
+    assert replica.router.query_counts['replica'] > before['replica']
@@ -0,0 +1,148 @@
+"""Student dashboard, grades page, registrar view and progress API from StudentAcademicSummary"""
+import re
+
+import pytest
+from sqlalchemy import event
+
+import main
+from main import db
+
+PREVIOUS = (2, '2023-2024')
+CURRENT = (1, '2024-2025')
+
+
+@pytest.fixture
+def history(make):
+    """A Dean's List previous term (six Academic subjects and a PE one) and a current term with one grade missing"""
+    student = make.student()
+    grades = [make.grade(student, make.subject(academic_year=PREVIOUS[1], semester=PREVIOUS[0]), average)
+              for average in (97, 96, 95, 94, 93, 92)]
+    grades.append(make.grade(student, make.subject(academic_year=PREVIOUS[1], semester=PREVIOUS[0],
+                                                   subject_type='PE', units=2), 78))
+    make.grade(student, make.subject(), 85)
+    make.grade(student, make.subject(), is_complete=False)
+    db.session.commit()
+    main.backfill_student_term_summaries()
+    return student, grades
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Template contexts of the pages rendered, by template name; the pages still render"""
+    contexts = {}
+    render_template = main.render_template
+
+    def record(template, **context):
+        contexts[template] = context
+        return render_template(template, **context)
+    monkeypatch.setattr(main, 'render_template', record)
+    return contexts
+
+
+def expected_gwa(grades):
+    """Units-weighted equivalent grade over the Academic subjects"""
+    academic = [grade for grade in grades if grade.subject.subject_type == 'Academic']
+    return round(sum(grade.equivalent_grade * grade.subject.units for grade in academic) /
+                 sum(grade.subject.units for grade in academic), 2)
+
+
+def shown_term(context):
+    return context['display_semester'], context['display_academic_year'], context['is_current_semester']
+
+
+def test_dashboard_shows_the_last_complete_term(history, client_as, rendered):
+    student, grades = history
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        assert client_as(student).get('/student/dashboard').status_code == 200
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    context = rendered['dashboards/student_dashboard.html']
+    assert shown_term(context) == PREVIOUS + (False,)
+    # By subject code, which the factory hands out in creation order
+    assert [grade.id for grade in context['grades']] == [grade.id for grade in grades]
+    assert (context['gwa'], context['total_units']) == (expected_gwa(grades), 20)
+    assert (context['latest_academic_year'], context['current_year_total_units']) == ('2024-2025', 3)
+    eligible, _, _, reason = main.check_deans_list_eligibility(student.id, *PREVIOUS)
+    assert (context['deans_list_eligible'], context['eligibility_reason']) == (eligible, reason) == (True, "Eligible for Dean's List")
+    # The displayed term's grades, subjects included, are read once for the table and the Dean's List check
+    assert sum(bool(re.search(r'\bFROM grade\b', statement)) for statement in statements) == 1
+
+
+def test_completing_the_current_term_shows_it(history, client_as, rendered):
+    student, _ = history
+    missing = main.Grade.query.filter_by(student_id=student.id, is_complete=False).one()
+    missing.prelim_grade = missing.midterm_grade = missing.final_grade = missing.final_average = 75
+    missing.equivalent_grade, missing.remarks = main.calculate_grade_equivalent(75)
+    missing.is_complete = True
+    main.refresh_student_term_summaries([(student.id, *CURRENT)])
+    db.session.commit()
+
+    assert client_as(student).get('/student/dashboard').status_code == 200
+    context = rendered['dashboards/student_dashboard.html']
+    assert shown_term(context) == CURRENT + (True,)
+    assert context['total_units'] == 6
+    assert context['eligibility_reason'] == 'Insufficient units (6/18 required)'
+
+
+def test_progress_series_is_embedded_and_served(history, client_as, rendered):
+    student, grades = history
+    client = client_as(student)
+    client.get('/student/dashboard')
+
+    progress = client.get('/api/student/progress-data').json['data']
+    assert rendered['dashboards/student_dashboard.html']['progress_data'] == progress
+    # Progress GWAs weigh every graded subject, not only the Academic ones
+    overall = round(sum(grade.equivalent_grade * grade.subject.units for grade in grades) / 20, 2)
+    assert [(term['semester'], term['academic_year'], term['gwa'], term['total_units'], term['subject_count'])
+            for term in progress['semester_data']] == [PREVIOUS + (overall, 20, 7), CURRENT + (main.calculate_grade_equivalent(85)[0], 3, 1)]
+    assert progress['academic_years'] == ['2023-2024', '2024-2025']
+
+
+def test_grades_page_lists_the_selected_year(history, client_as, rendered):
+    student, grades = history
+    client = client_as(student)
+
+    assert client.get('/student/grades', query_string={'year': '2023-2024'}).status_code == 200
+    context = rendered['student/student_grades.html']
+    [term] = context['grades_by_year_semester'].values()
+    assert (term['semester'], term['academic_year'], term['total_units']) == PREVIOUS + (20,)
+    # Year level, then subject code
+    assert [grade['id'] for grade in term['grades']] == [grade.id for grade in grades]
+    assert (context['academic_years'], context['subject_count'], context['total_units_all']) == (['2024-2025', '2023-2024'], 8, 23)
+
+    # A year without complete grades lists nothing
+    client.get('/student/grades', query_string={'year': '1999-2000'})
+    assert (rendered['student/student_grades.html']['selected_year'], rendered['student/student_grades.html']['grades_by_year_semester']) == ('', {})
+
+
+def test_registrar_view_matches_the_student_dashboard(history, make, client_as, rendered):
+    student, grades = history
+    client = client_as(make.user('registrar'))
+    db.session.commit()
+
+    assert client.get(f'/registrar/view-student/{student.id}').status_code == 200
+    context = rendered['dashboards/student_dashboard.html']
+    assert context['view_only'] is True
+    assert shown_term(context) == PREVIOUS + (False,)
+    assert (context['gwa'], context['deans_list_eligible']) == (expected_gwa(grades), True)
+    assert context['progress_data']['academic_years'] == ['2023-2024', '2024-2025']
+
+
+def test_student_pages_turn_other_roles_away(make, client_as):
+    client = client_as(make.user('registrar'))
+    db.session.commit()
+    assert client.get('/student/dashboard').status_code == 302
+    assert client.get('/api/student/progress-data').status_code == 403
+
+
+def test_summary_is_built_once_per_request(history):
+    student, _ = history
+    with main.app.test_request_context():
+        summary = main.StudentAcademicSummary.for_student(student)
+        assert main.StudentAcademicSummary.for_student(student) is summary
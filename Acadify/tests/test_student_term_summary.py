@@ -0,0 +1,69 @@
+"""Student pages on grades that were written before the term summaries existed"""
+from sqlalchemy import event
+
+import main
+from main import Student, StudentTermSummary, db
+
+
+def seed_unsummarized_grades(make):
+    """Two terms of grades and an orphan grade, written without refreshing summaries"""
+    student = make.student()
+    for average in (95.0, 90.0):
+        make.grade(student, make.subject(), average)
+    make.grade(student, make.subject(academic_year='2023-2024', semester=2), 85.0)
+    make.grade(student, make.subject(), 99.0).subject_id = 999999
+    db.session.commit()
+    return student
+
+
+def summarized_terms(student):
+    db.session.expire_all()
+    return {(summary.academic_year, summary.semester) for summary in StudentTermSummary.query.filter_by(student_id=student.id)}
+
+
+def test_student_pages_only_read(make, client_as):
+    student = seed_unsummarized_grades(make)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0].upper())
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client_as(student).get('/api/student/progress-data')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert response.json['data']['semester_data'] == []
+    assert set(statements) == {'SELECT'}
+    assert summarized_terms(student) == set()
+
+
+def test_backfill_stores_missing_summaries_once(make, client_as, monkeypatch):
+    student = seed_unsummarized_grades(make)
+    assert main.backfill_student_term_summaries() == 2
+    assert summarized_terms(student) == {('2023-2024', 2), ('2024-2025', 1)}
+    assert db.session.get(Student, student.id).total_units == 9
+
+    data = client_as(student).get('/api/student/progress-data').json['data']
+    assert [(term['academic_year'], term['semester'], term['subject_count']) for term in data['semester_data']] == [
+        ('2023-2024', 2, 1), ('2024-2025', 1, 2)
+    ]
+    result = main.app.test_cli_runner().invoke(args=['check-student-term-summaries'])
+    assert result.exit_code == 0, result.output
+
+    # Nothing is missing the second time, so nothing is written
+    calls = []
+    monkeypatch.setattr(main, 'refresh_student_term_summaries', lambda terms: calls.append(list(terms)))
+    assert main.backfill_student_term_summaries() == 0
+    assert calls == []
+
+
+def test_partly_summarized_student_gets_the_missing_terms(make):
+    student = seed_unsummarized_grades(make)
+    main.refresh_student_term_summaries([(student.id, 1, '2024-2025')])
+    db.session.commit()
+
+    assert main.backfill_student_term_summaries() == 1
+    summary = main.StudentAcademicSummary(student)
+    assert set(summary.terms) == {('2023-2024', 2), ('2024-2025', 1)}
+    assert summary.term_gwa(2, '2023-2024') == (2.25, 3)
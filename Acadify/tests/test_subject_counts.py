@@ -0,0 +1,128 @@
+"""Dashboard enrollment and grade counts from grouped aggregates, against the per-assignment queries they replaced"""
+import random
+
+import pytest
+
+import main
+from main import ClassAssignment, Grade, Student, StudentSubject, Subject, db
+
+
+def legacy_instructor_counts(instructor_id):
+    """instructor_dashboard's per-assignment counts as they were before subject_status_counts"""
+    counts = {}
+    for subject, assignment in db.session.query(Subject, ClassAssignment).join(
+        ClassAssignment, Subject.id == ClassAssignment.subject_id
+    ).filter(ClassAssignment.instructor_id == instructor_id):
+        unique_key = f"{subject.id}_{assignment.section or 'General'}_{assignment.school_year}"
+        grade_year = assignment.school_year or subject.academic_year
+        years = list(dict.fromkeys(year for year in [assignment.school_year, subject.academic_year] if year))
+        enrolled = StudentSubject.query.filter(
+            StudentSubject.subject_id == subject.id,
+            StudentSubject.semester == subject.semester,
+            StudentSubject.status == 'ENROLLED'
+        )
+        if years:
+            enrolled = enrolled.filter(StudentSubject.academic_year.in_(years))
+        student_ids = [row.student_id for row in enrolled]
+        enrolled_count = Student.query.filter(Student.id.in_(student_ids), Student.active == True).count()
+        if assignment.section and student_ids:
+            in_section = Student.query.filter(Student.id.in_(student_ids), Student.section == assignment.section).count()
+            if in_section:
+                enrolled_count = in_section
+        grades = Grade.query.filter_by(subject_id=subject.id, semester=subject.semester, academic_year=grade_year)
+        counts[unique_key] = {
+            'enrolled_count': enrolled_count,
+            'total': grades.count(),
+            'complete': grades.filter_by(is_complete=True).count(),
+            'draft': grades.filter_by(is_complete=False).count()
+        }
+    return counts
+
+
+def legacy_registrar_counts():
+    """The registrar dashboard's counts: ENROLLED rows of the subject's term, and its grades"""
+    counts = {}
+    for subject in Subject.query.join(StudentSubject, Subject.id == StudentSubject.subject_id).filter(
+        StudentSubject.status == 'ENROLLED'
+    ).distinct():
+        grades = Grade.query.filter_by(subject_id=subject.id, semester=subject.semester, academic_year=subject.academic_year)
+        counts[subject.id] = {
+            'enrolled_count': StudentSubject.query.filter_by(
+                subject_id=subject.id, semester=subject.semester, academic_year=subject.academic_year, status='ENROLLED'
+            ).count(),
+            'total': grades.count(),
+            'complete': grades.filter_by(is_complete=True).count(),
+            'draft': grades.filter_by(is_complete=False).count()
+        }
+    return counts
+
+
+def seed_classes(make, seed):
+    """Two instructors' assignments over shared subjects: sections, inactive students, two enrollment years"""
+    rnd = random.Random(seed)
+    instructors = [make.user('instructor') for _ in range(2)]
+    subjects = [make.subject() for _ in range(4)]
+    for subject in subjects:
+        for section in rnd.sample(['A', 'B', None], rnd.randint(1, 3)):
+            db.session.add(ClassAssignment(subject_id=subject.id, instructor_id=rnd.choice(instructors).id, section=section,
+                                           school_year=rnd.choice(['2024-2025', '2025-2026']), semester=1))
+    for _ in range(60):
+        student = make.student(section=rnd.choice(['A', 'B', 'C']), active=rnd.random() < 0.8)
+        for subject in rnd.sample(subjects, rnd.randint(0, 3)):
+            years = rnd.choice([['2024-2025'], ['2025-2026'], ['2024-2025', '2025-2026']])
+            for year in years:
+                db.session.add(StudentSubject(student_id=student.id, subject_id=subject.id, academic_year=year,
+                                              semester=1, status=rnd.choice(['ENROLLED'] * 4 + ['DROPPED'])))
+            if rnd.random() < 0.7:
+                grade = make.grade(student, subject, round(rnd.uniform(70, 99), 2))
+                grade.is_complete = rnd.random() < 0.6
+    db.session.commit()
+    return instructors
+
+
+def status_counts(subject_status, *fields):
+    return {key: {field: status[field] for field in fields} for key, status in subject_status.items()}
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_instructor_counts_match_the_per_assignment_queries(make, seed):
+    for instructor in seed_classes(make, seed):
+        status = main.instructor_subject_status(instructor.id)['subject_status']
+        assert status_counts(status, 'enrolled_count', 'total', 'complete', 'draft') == legacy_instructor_counts(instructor.id)
+
+        # The dashboard poll skips the grade totals but counts the same students
+        poll = main.instructor_subject_status(instructor.id, include_grades=False)['subject_status']
+        assert status_counts(poll, 'enrolled_count') == status_counts(status, 'enrolled_count')
+        assert all('total' not in counts for counts in poll.values())
+
+
+def test_registrar_counts_match_the_per_subject_queries(make):
+    seed_classes(make, 4)
+    status = main.registrar_subject_status()['subject_status']
+    assert status_counts(status, 'enrolled_count', 'total', 'complete', 'draft') == legacy_registrar_counts()
+
+
+def test_student_enrolled_under_both_years_counts_once(make):
+    instructor, subject = make.user('instructor'), make.subject()
+    db.session.add(ClassAssignment(subject_id=subject.id, instructor_id=instructor.id, section='A',
+                                   school_year='2025-2026', semester=1))
+    student = make.student(section='A')
+    for year in ('2024-2025', '2025-2026'):
+        db.session.add(StudentSubject(student_id=student.id, subject_id=subject.id, academic_year=year, semester=1))
+    db.session.commit()
+
+    [counts] = main.instructor_subject_status(instructor.id)['subject_status'].values()
+    assert (counts['enrolled'], counts['active'], counts['in_section'], counts['enrolled_count']) == (2, 1, 1, 1)
+
+
+def test_counts_endpoint_polls_with_the_change_feed(make, client_as):
+    instructor = seed_classes(make, 5)[0]
+    client = client_as(instructor)
+
+    response = client.get('/api/instructor-subject-counts')
+    expected = {key: {'enrolled_count': counts['enrolled_count']} for key, counts in legacy_instructor_counts(instructor.id).items()}
+    assert response.json['counts'] == expected
+    cursor = response.json['cursor']
+
+    # Nothing was enrolled since, so the poll is answered without counting
+    assert client.get('/api/instructor-subject-counts', query_string={'cursor': cursor}).status_code == 304